@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import threading
+import itertools
+from datetime import datetime
+
+from src.core.file_copy import file_hash
+
+BACKUP_FOLDER = "_backup"
+INDEX_NAME = ".noobtools_backups.json"
+DEFAULT_KEEP = 10
+DEFAULT_MAX_MB = 4096
+DEFAULT_WINDOW = 120
+
+
+class BackupManager(object):
+    """Backups automáticos da cena antes das operações destrutivas.
+
+    O save em si é do Max (thread da UI); aqui fica só a decisão e a arrumação:
+    - não salva se a cena não tem alterações (o .max em disco já é o backup);
+    - no máximo um backup por cena a cada `window` segundos;
+    - `finalize` (pode rodar numa thread) calcula o hash do snapshot, descarta cópias
+      idênticas a um backup já guardado e aplica a rotação: `keep` por cena e
+      `max_mb` no total da pasta _backup.
+    """
+
+    def __init__(self, keep=DEFAULT_KEEP, max_mb=DEFAULT_MAX_MB, window=DEFAULT_WINDOW):
+        self.configure(keep, max_mb, window)
+        self._last = {}         # cena -> hora do último snapshot
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def configure(self, keep=DEFAULT_KEEP, max_mb=DEFAULT_MAX_MB, window=DEFAULT_WINDOW):
+        self.keep = max(1, int(keep))
+        self.max_bytes = max(1, int(max_mb)) * 1024 * 1024
+        self.window = max(0, int(window))
+
+    @staticmethod
+    def backup_dir(scene_path):
+        return os.path.join(os.path.dirname(scene_path), BACKUP_FOLDER)
+
+    # --------------------------------------------------------------------------
+    # Decisão (thread da UI)
+    # --------------------------------------------------------------------------
+    def should_backup(self, scene_path, dirty=True):
+        """(salvar?, motivo)."""
+        if not scene_path: return False, "cena sem arquivo"
+        if not dirty: return False, "cena sem alterações"
+        last = self._last.get(os.path.normcase(scene_path))
+        if last is not None and time.time() - last < self.window: return False, "backup recente ({:.0f}s)".format(time.time() - last)
+        return True, ""
+
+    def snapshot_path(self, scene_path):
+        """Caminho temporário (único por snapshot) onde o Max deve salvar; um BackupWorker
+        anterior pode ainda estar lendo o snapshot de antes."""
+        folder = self.backup_dir(scene_path)
+        if not os.path.isdir(folder): os.makedirs(folder)
+        stem = os.path.splitext(os.path.basename(scene_path))[0]
+        return os.path.join(folder, ".{}_{}_{}.tmp.max".format(stem, os.getpid(), next(self._counter)))
+
+    def mark_saved(self, scene_path):
+        self._last[os.path.normcase(scene_path)] = time.time()
+
+    # --------------------------------------------------------------------------
+    # Dedupe e rotação (pode rodar em background)
+    # --------------------------------------------------------------------------
+    def _load_index(self, folder):
+        try:
+            with open(os.path.join(folder, INDEX_NAME), 'r', encoding='utf-8') as f: entries = json.load(f)
+        except (OSError, ValueError): entries = []
+        # Descarta entradas cujos arquivos foram apagados à mão
+        return [e for e in entries if os.path.isfile(os.path.join(folder, e['file']))]
+
+    def _save_index(self, folder, entries):
+        try:
+            with open(os.path.join(folder, INDEX_NAME), 'w', encoding='utf-8') as f: json.dump(entries, f, indent=1, ensure_ascii=False)
+        except OSError: pass
+
+    def finalize(self, scene_path, temp_path):
+        """Guarda o snapshot salvo em `temp_path`. Retorna (caminho do backup, se era repetido)."""
+        folder = self.backup_dir(scene_path)
+        scene = os.path.basename(scene_path)
+        digest = file_hash(temp_path)
+        with self._lock:
+            entries = self._load_index(folder)
+            same = next((e for e in entries if e['scene'] == scene and e['hash'] == digest), None)
+            if same is not None:
+                os.remove(temp_path)
+                same['time'] = time.time()
+                final, duplicate = os.path.join(folder, same['file']), True
+            else:
+                stem = "{}_{}".format(os.path.splitext(scene)[0], datetime.now().strftime("%Y%m%d_%H%M%S"))
+                name, n = stem + ".max", 0
+                while os.path.exists(os.path.join(folder, name)):
+                    n += 1
+                    name = "{}_{}.max".format(stem, n)
+                final = os.path.join(folder, name)
+                os.replace(temp_path, final)
+                entries.append({'file': name, 'scene': scene, 'hash': digest, 'size': os.path.getsize(final), 'time': time.time()})
+                duplicate = False
+            entries = self._rotate(folder, entries)
+            self._save_index(folder, entries)
+        return final, duplicate
+
+    def _rotate(self, folder, entries):
+        entries.sort(key=lambda e: e['time'], reverse=True)
+        newest = entries[0] if entries else None
+        kept, total, per_scene = [], 0, {}
+        for e in entries:
+            count = per_scene.get(e['scene'], 0)
+            if e is not newest and (count >= self.keep or total + e['size'] > self.max_bytes):
+                try: os.remove(os.path.join(folder, e['file']))
+                except OSError: pass
+                continue
+            per_scene[e['scene']] = count + 1
+            total += e['size']
+            kept.append(e)
+        return kept
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+
+DEFAULT_MAX_PATHS = 40
+
+
+def path_key(path):
+    return path.rstrip("\\/").lower()
+
+
+class MaxBitmapPaths(object):
+    """Acesso aos caminhos de busca de bitmaps do Max. `rt` é o pymxs.runtime (injetado:
+    este módulo não importa o pymxs). Usa `mapPaths` (count/get/add/delete) e cai para
+    `bitmapPaths`/`pathConfig` nas versões que não têm."""
+
+    def __init__(self, rt):
+        self.rt = rt
+
+    def list(self):
+        try:
+            mp = self.rt.mapPaths
+            return [mp.get(i) for i in range(1, mp.count() + 1)]
+        except Exception: pass
+        try: return list(self.rt.bitmapPaths.getPaths())
+        except Exception: return []
+
+    def add(self, path):
+        for add in (lambda: self.rt.mapPaths.add(path), lambda: self.rt.bitmapPaths.add(path),
+                    lambda: self.rt.pathConfig.appendPathToBitmaps(path)):
+            try:
+                add()
+                return True
+            except Exception: pass
+        return False
+
+    def remove(self, path):
+        try:
+            mp = self.rt.mapPaths
+            for i in range(mp.count(), 0, -1):
+                if path_key(mp.get(i)) == path_key(path):
+                    mp.delete(i)
+                    return True
+        except Exception: pass
+        return False
+
+
+class BitmapPathRegistry(object):
+    """Caminhos de busca de bitmaps que o NoobTools adicionou ao Max.
+
+    Cada import pedia as pastas do asset e nada saía da lista; como toda textura (e o
+    render) percorre esses caminhos, a busca ficava mais lenta o dia todo. Aqui:
+    - o conjunto atual do Max é lido uma vez e mantido em memória;
+    - caminhos que o usuário já tinha nunca são tocados;
+    - os do NoobTools ficam em ordem LRU, limitados a `max_paths` (os mais antigos saem);
+    - `release_all` tira todos (ex.: ao fechar, se a sessão não deve deixar rastros).
+    `owned` é persistido nas configurações, para a limpeza valer entre sessões.
+    """
+
+    def __init__(self, backend, max_paths=DEFAULT_MAX_PATHS, owned=()):
+        self.backend = backend
+        self.max_paths = max(1, int(max_paths))
+        self._known = None
+        self._owned = OrderedDict((path_key(p), p) for p in owned)
+
+    def _current(self):
+        if self._known is None:
+            self._known = set(path_key(p) for p in self.backend.list())
+            # Os da sessão anterior que já não estão no Max não são mais nossos
+            for key in [k for k in self._owned if k not in self._known]: del self._owned[key]
+        return self._known
+
+    def reload(self):
+        """Relê os caminhos do Max (se alguém mexeu na configuração por fora)."""
+        self._known = None
+        self._current()
+
+    def owned(self): return list(self._owned.values())
+
+    def set_limit(self, max_paths):
+        self.max_paths = max(1, int(max_paths))
+        self._trim()
+
+    def ensure(self, paths):
+        """Garante os caminhos no Max; retorna os que foram adicionados agora."""
+        known = self._current()
+        added = []
+        for path in paths:
+            key = path_key(path)
+            if key in self._owned:
+                self._owned.move_to_end(key)
+                continue
+            if key in known: continue
+            if not self.backend.add(path): continue
+            known.add(key)
+            self._owned[key] = path
+            added.append(path)
+        self._trim()
+        return added
+
+    def _trim(self):
+        known = self._current()
+        while len(self._owned) > self.max_paths:
+            key, path = self._owned.popitem(last=False)
+            if self.backend.remove(path):
+                known.discard(key)
+                continue
+            # Max sem mapPaths.delete: não dá para limitar, o caminho continua nosso
+            self._owned[key] = path
+            self._owned.move_to_end(key, last=False)
+            break
+
+    def release_all(self):
+        """Remove do Max todos os caminhos que o NoobTools adicionou. Retorna quantos."""
+        known = self._current()
+        removed = 0
+        for key, path in list(self._owned.items()):
+            if self.backend.remove(path):
+                known.discard(key)
+                del self._owned[key]
+                removed += 1
+        return removed
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+# Compartilhamentos de rede são limitados pela latência, não pela CPU: muitas
+# listagens em paralelo escondem as idas e vindas ao servidor.
+DEFAULT_WORKERS = 16
+
+
+def list_dir(path):
+    """Lista um diretório com uma única chamada scandir.
+
+    Retorna ([(nome, tamanho, mtime)], [subdiretórios]). No Windows o stat dos
+    DirEntry já vem na própria listagem, sem outra ida ao servidor por arquivo.
+    """
+    files, subdirs = [], []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                if entry.is_dir():
+                    subdirs.append(entry.path)
+                elif entry.is_file():
+                    st = entry.stat()
+                    files.append((entry.name, st.st_size, st.st_mtime))
+            except OSError: continue
+    return files, subdirs
+
+
+class ParallelCrawler(object):
+    """Percorre árvores de diretórios com vários diretórios sendo visitados ao mesmo tempo.
+
+    `visit(path)` roda nas threads do pool e retorna (resultado, subdiretórios,
+    nº de arquivos). `crawl` é um gerador: os resultados chegam na thread de quem
+    itera, na ordem em que ficam prontos, então gravar em SQLite ou casar com uma
+    lista pode ser feito ali sem locks. Parar a iteração (ou `should_stop`) cancela
+    o que ainda está na fila.
+    """
+    PROGRESS_INTERVAL = 0.25
+
+    def __init__(self, workers=DEFAULT_WORKERS, progress=None, should_stop=None):
+        self.workers = workers
+        self.progress = progress          # progress(pastas, arquivos, pastas/s, arquivos/s)
+        self.should_stop = should_stop
+        self.dirs = 0
+        self.files = 0
+        self._start = 0.0
+        self._last_report = 0.0
+
+    def crawl(self, roots, visit, recursive=True):
+        self.dirs = self.files = 0
+        self._start = self._last_report = time.time()
+        results = queue.Queue()
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        futures = set()
+
+        def submit(path):
+            future = executor.submit(visit, path)
+            futures.add(future)
+            future.add_done_callback(results.put)
+
+        try:
+            for root in roots: submit(root)
+            while futures:
+                if self.should_stop and self.should_stop(): break
+                try: future = results.get(timeout=self.PROGRESS_INTERVAL)
+                except queue.Empty:
+                    self._report()
+                    continue
+                futures.discard(future)
+                try: result, subdirs, nfiles = future.result()
+                except Exception: continue
+                self.dirs += 1
+                self.files += nfiles
+                if recursive:
+                    for d in subdirs: submit(d)
+                self._report()
+                yield result
+        finally:
+            for future in futures: future.cancel()
+            executor.shutdown(wait=False)
+        self._report(force=True)
+
+    def rates(self):
+        elapsed = max(time.time() - self._start, 1e-6)
+        return self.dirs / elapsed, self.files / elapsed
+
+    def _report(self, force=False):
+        if not self.progress: return
+        now = time.time()
+        if not force and now - self._last_report < self.PROGRESS_INTERVAL: return
+        self._last_report = now
+        dirs_rate, files_rate = self.rates()
+        try: self.progress(self.dirs, self.files, dirs_rate, files_rate)
+        except Exception: pass
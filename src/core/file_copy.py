@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_COPY_WORKERS = 4
+JOURNAL_NAME = ".noobtools_collect.json"
+
+
+def file_hash(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""): h.update(chunk)
+    return h.hexdigest()
+
+
+def is_identical(src, src_stat, dst, verify_hash=True):
+    """Mesmo tamanho e mtime (tolerância de 2 s, FAT/SMB); com mtime diferente, compara o hash."""
+    try: dst_stat = os.stat(dst)
+    except OSError: return False
+    if dst_stat.st_size != src_stat.st_size: return False
+    if abs(dst_stat.st_mtime - src_stat.st_mtime) <= 2.0: return True
+    if not verify_hash: return False
+    try: return file_hash(src) == file_hash(dst)
+    except OSError: return False
+
+
+class CopyTask(object):
+    __slots__ = ('src', 'dst', 'size', 'mtime')
+
+    def __init__(self, src, dst, size, mtime):
+        self.src, self.dst, self.size, self.mtime = src, dst, size, mtime
+
+
+class FileCollector(object):
+    """Copia arquivos para uma pasta de destino em paralelo (ex.: COLETAR texturas).
+
+    - Pula o que já está lá idêntico (tamanho+mtime ou hash).
+    - Nomes iguais de origens diferentes viram `nome_1.ext`, `nome_2.ext`...
+    - Copia em blocos para `<destino>.part` e renomeia no fim; uma cópia interrompida
+      continua do ponto onde parou na próxima execução.
+    - Um journal na pasta de destino lembra de qual origem veio cada nome, para a
+      mesma textura atualizada sobrescrever o seu arquivo em vez de ganhar um sufixo.
+    `progress` recebe (bytes copiados, total de bytes, arquivos prontos, total, bytes/s).
+    """
+    PROGRESS_INTERVAL = 0.2
+
+    def __init__(self, target_dir, workers=DEFAULT_COPY_WORKERS, verify_hash=True):
+        self.target_dir = target_dir
+        self.workers = workers
+        self.verify_hash = verify_hash
+        self.journal_path = os.path.join(target_dir, JOURNAL_NAME)
+        self.journal = self._load_journal()   # nome (minúsculo) -> origem
+        self._lock = threading.Lock()
+
+    def _load_journal(self):
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f: return json.load(f)
+        except (OSError, ValueError): return {}
+
+    def _save_journal(self):
+        try:
+            with open(self.journal_path, 'w', encoding='utf-8') as f: json.dump(self.journal, f, indent=1, ensure_ascii=False)
+        except OSError: pass
+
+    # --------------------------------------------------------------------------
+    # Plano
+    # --------------------------------------------------------------------------
+    def plan(self, paths):
+        """Retorna (tarefas, {origem: destino} já idênticos, origens que não existem)."""
+        tasks, ready, missing = [], {}, []
+        taken = {}   # nome (minúsculo) -> origem (minúscula) neste plano
+        seen = set()
+        for src in paths:
+            if src.lower() in seen: continue
+            seen.add(src.lower())
+            try: st = os.stat(src)
+            except OSError:
+                missing.append(src)
+                continue
+            stem, ext = os.path.splitext(os.path.basename(src))
+            n = 0
+            while True:
+                name = "{}_{}{}".format(stem, n, ext) if n else stem + ext
+                key = name.lower()
+                dst = os.path.join(self.target_dir, name)
+                owner = taken.get(key)
+                if owner is not None and owner != src.lower():
+                    n += 1
+                    continue
+                if is_identical(src, st, dst, self.verify_hash):
+                    ready[src] = dst
+                    break
+                if not os.path.exists(dst) or self.journal.get(key, "").lower() == src.lower():
+                    tasks.append(CopyTask(src, dst, st.st_size, st.st_mtime))
+                    break
+                n += 1   # arquivo diferente com esse nome já está no destino
+            taken[key] = src.lower()
+            self.journal[key] = src
+        return tasks, ready, missing
+
+    # --------------------------------------------------------------------------
+    # Cópia
+    # --------------------------------------------------------------------------
+    def _copy(self, task, should_stop, add_bytes):
+        part = task.dst + ".part"
+        offset = 0
+        try:
+            pst = os.stat(part)
+            # Só continua um .part gravado depois da última alteração da origem
+            if pst.st_size <= task.size and pst.st_mtime >= task.mtime: offset = pst.st_size
+        except OSError: pass
+        if offset: add_bytes(offset)
+        with open(task.src, 'rb') as fin, open(part, 'ab' if offset else 'wb') as fout:
+            fin.seek(offset)
+            while True:
+                if should_stop and should_stop(): return False
+                chunk = fin.read(CHUNK_SIZE)
+                if not chunk: break
+                fout.write(chunk)
+                add_bytes(len(chunk))
+        os.replace(part, task.dst)
+        shutil.copystat(task.src, task.dst)   # mesmo mtime: a próxima coleta pula sem hash
+        return True
+
+    def run(self, tasks, should_stop=None, progress=None):
+        """Copia as tarefas; retorna ({origem: destino} copiados, [(origem, erro)])."""
+        if not os.path.isdir(self.target_dir): os.makedirs(self.target_dir)
+        total = sum(t.size for t in tasks)
+        state = {'bytes': 0, 'files': 0, 'last': 0.0}
+        start = time.time()
+        copied, errors = {}, []
+
+        def report(force=False):
+            now = time.time()
+            if not progress or (not force and now - state['last'] < self.PROGRESS_INTERVAL): return
+            state['last'] = now
+            progress(state['bytes'], total, state['files'], len(tasks), state['bytes'] / max(now - start, 1e-6))
+
+        def add_bytes(n):
+            with self._lock:
+                state['bytes'] += n
+                report()
+
+        def work(task):
+            if should_stop and should_stop(): return
+            try: done = self._copy(task, should_stop, add_bytes)
+            except (OSError, IOError) as e:
+                with self._lock: errors.append((task.src, str(e)))
+                return
+            if done:
+                with self._lock:
+                    copied[task.src] = task.dst
+                    state['files'] += 1
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                list(pool.map(work, tasks))
+        finally:
+            self._save_journal()
+        report(force=True)
+        return copied, errors
+
+    def collect(self, paths, should_stop=None, progress=None):
+        """plan + run. Retorna um dict com mapping (origem -> destino de tudo o que está
+        no destino), copied, skipped, missing, errors, bytes e cancelled."""
+        tasks, ready, missing = self.plan(paths)
+        copied, errors = self.run(tasks, should_stop, progress)
+        mapping = dict(ready)
+        mapping.update(copied)
+        return {'mapping': mapping, 'copied': len(copied), 'skipped': len(ready), 'missing': missing,
+                'errors': errors, 'bytes': sum(t.size for t in tasks if t.src in copied),
+                'cancelled': bool(should_stop and should_stop())}
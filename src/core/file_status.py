@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.core.crawler import DEFAULT_WORKERS
+
+
+class FileStatusCache(object):
+    """Existência de arquivos por caminho, verificada em paralelo e guardada por `ttl` segundos.
+
+    Num drive de rede cada verificação é uma ida ao servidor; com várias threads o
+    scan da cena fica limitado pela rede e não por uma fila única. Repetir o scan
+    logo depois (ex.: após um relink) só verifica os caminhos novos.
+    """
+    TTL = 30.0
+
+    def __init__(self, ttl=TTL, workers=DEFAULT_WORKERS):
+        self.ttl = ttl
+        self.workers = workers
+        self._status = {}   # caminho -> (existe, quando)
+        self._lock = threading.Lock()
+
+    def invalidate(self, paths=None):
+        with self._lock:
+            if paths is None: self._status.clear()
+            else:
+                for p in paths: self._status.pop(p, None)
+
+    def check_many(self, paths, should_stop=None):
+        """Retorna ({caminho: existe}, quantos vieram do cache)."""
+        now = time.time()
+        result, todo = {}, []
+        with self._lock:
+            for p in set(paths):
+                hit = self._status.get(p)
+                if hit is not None and now - hit[1] < self.ttl: result[p] = hit[0]
+                else: todo.append(p)
+        cached = len(result)
+        if todo:
+            def check(path):
+                if should_stop and should_stop(): return None
+                try: return os.path.isfile(path)
+                except Exception: return False
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                checked = list(pool.map(check, todo))
+            stamp = time.time()
+            with self._lock:
+                for p, exists in zip(todo, checked):
+                    if exists is None: continue
+                    self._status[p] = (exists, stamp)
+                    result[p] = exists
+        return result, cached
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import heapq
+from array import array
+from collections import namedtuple
+
+# Pesos do ranking (somam 1.0)
+W_NAME, W_EXT, W_PATH, W_SIZE = 0.6, 0.15, 0.15, 0.1
+
+IMAGE_EXTS = frozenset((".jpg", ".jpeg", ".png", ".tga", ".tif", ".tiff", ".bmp", ".exr", ".hdr", ".psd", ".dds", ".tx"))
+
+# Orçamento de entradas de postings lidas por consulta: as chaves mais raras
+# primeiro, até esse total. Mantém a consulta rápida mesmo com milhões de arquivos.
+POSTING_BUDGET = 5000
+
+_SEP_RE = re.compile(r"[\s\-_.]+")
+_TOKEN_RE = re.compile(r"\d+[^\W\d_]*|[^\W\d_]+", re.UNICODE)
+
+Candidate = namedtuple("Candidate", "path score name_score")
+
+
+def normalize(stem):
+    return _SEP_RE.sub("_", stem.lower()).strip("_")
+
+
+def trigrams(text):
+    padded = "  " + text + " "
+    return set(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def gram_keys(stem):
+    """Chaves de bloqueio: o trigrama inicial de cada palavra do nome ("wood_diff_2k" ->
+    woo, dif, 2k). Poucas por nome, então o índice cabe em memória e monta rápido;
+    `diff`/`diffuse` e `_2K`/`_4K` continuam dividindo a maioria das chaves."""
+    return set(tok[:3] for tok in _TOKEN_RE.findall(stem))
+
+
+def base_name(path):
+    """Nome do arquivo aceitando \\ e / (caminhos do Windows também no Linux, p/ o planner)."""
+    return path.replace("\\", "/").rsplit("/", 1)[-1]
+
+
+def path_parts(path):
+    """Componentes de pasta (minúsculos), sem drive/servidor."""
+    parent = os.path.dirname(path.replace("\\", "/"))
+    return [p.lower() for p in parent.split("/") if p and not p.endswith(":")]
+
+
+class FuzzyIndex(object):
+    """Índice de trigramas sobre os nomes de arquivos varridos, para achar candidatos
+    ao relink mesmo quando o nome não bate exatamente (`wood_diff` x `wood_diffuse`,
+    `_2K` x `_4K`).
+
+    Nomes idênticos saem de um dicionário. Os postings das chaves (`gram_keys`) são
+    por nome único, não por arquivo, guardados em `array` e só montados na primeira
+    consulta que precisar de busca aproximada. Os candidatos que dividem chaves
+    suficientes são medidos pela semelhança de trigramas (Dice) e ordenados por
+    nome, extensão, pastas em comum com o caminho original e tamanho.
+    """
+
+    def __init__(self, files):
+        self.paths = []
+        self.sizes = array('q')
+        self._stem_ids = {}       # nome normalizado -> id
+        self._stems = []          # id -> nome normalizado
+        self._stem_files = []     # id -> [índices em paths]
+        self._postings = None
+        for path, size in files:
+            stem = normalize(os.path.splitext(base_name(path))[0])
+            sid = self._stem_ids.get(stem)
+            if sid is None:
+                sid = self._stem_ids[stem] = len(self._stems)
+                self._stems.append(stem)
+                self._stem_files.append([])
+            self._stem_files[sid].append(len(self.paths))
+            self.paths.append(path)
+            self.sizes.append(size or 0)
+
+    def _build_postings(self):
+        postings = {}
+        get = postings.get
+        for sid, stem in enumerate(self._stems):
+            for key in gram_keys(stem):
+                posting = get(key)
+                if posting is None: posting = postings[key] = array('I')
+                posting.append(sid)
+        self._postings = postings
+
+    @classmethod
+    def from_relink_index(cls, relink_index, root, include_subfolders=True):
+        return cls(relink_index.iter_files(root, include_subfolders))
+
+    def __len__(self): return len(self.paths)
+
+    # --------------------------------------------------------------------------
+    # Consulta
+    # --------------------------------------------------------------------------
+    def _similar_stems(self, stem, min_similarity, limit):
+        if self._postings is None: self._build_postings()
+        keys = gram_keys(stem)
+        posted = sorted((self._postings[k] for k in keys if k in self._postings), key=len)
+        if not posted: return []
+        counts = {}
+        read = used = 0
+        for posting in posted:
+            if used >= 2 and read + len(posting) > POSTING_BUDGET: break
+            for sid in posting: counts[sid] = counts.get(sid, 0) + 1
+            read += len(posting)
+            used += 1
+        # Semelhança de Dice sobre os trigramas completos, só para quem passou no filtro
+        # Nomes curtos precisam de todas as chaves lidas; nomes longos toleram uma diferente
+        need = used if used <= 2 else used - 1
+        grams = trigrams(stem)
+        scored = []
+        for sid, hits in counts.items():
+            if hits < need: continue
+            other = trigrams(self._stems[sid])
+            sim = 2.0 * len(grams & other) / (len(grams) + len(other))
+            if sim >= min_similarity: scored.append((sim, sid))
+        return heapq.nlargest(limit, scored)
+
+    @staticmethod
+    def score(missing_path, cand_path, cand_size, name_score, expected_size=None):
+        ext_a = os.path.splitext(missing_path)[1].lower()
+        ext_b = os.path.splitext(cand_path)[1].lower()
+        if ext_a == ext_b: ext_score = 1.0
+        elif ext_a in IMAGE_EXTS and ext_b in IMAGE_EXTS: ext_score = 0.5
+        else: ext_score = 0.0
+
+        parts_a = path_parts(missing_path)
+        parts_b = set(path_parts(cand_path))
+        path_score = float(sum(1 for p in parts_a if p in parts_b)) / len(parts_a) if parts_a else 0.0
+
+        if expected_size: size_score = max(0.0, 1.0 - abs(cand_size - expected_size) / float(expected_size))
+        else: size_score = 1.0 if cand_size > 0 else 0.0   # arquivo vazio costuma ser cópia quebrada
+
+        return W_NAME * name_score + W_EXT * ext_score + W_PATH * path_score + W_SIZE * size_score
+
+    def candidates(self, missing_path, limit=5, min_similarity=0.6, ignore_ext=True, fuzzy=True, expected_size=None):
+        """Candidatos para um arquivo faltando, do melhor para o pior.
+
+        Nomes idênticos entram com semelhança 1.0; a busca por trigramas só roda se
+        `fuzzy` e não houver nome idêntico. Com `ignore_ext=False` só vale a mesma extensão.
+        """
+        ext = os.path.splitext(missing_path)[1].lower()
+        stem = normalize(os.path.splitext(base_name(missing_path))[0])
+        exact = self._stem_ids.get(stem)
+        result = self._collect(missing_path, [(1.0, exact)] if exact is not None else [], ext, ignore_ext, expected_size)
+        if not result and fuzzy:
+            similar = [(sim, sid) for sim, sid in self._similar_stems(stem, min_similarity, limit * 4) if sid != exact]
+            result = self._collect(missing_path, similar, ext, ignore_ext, expected_size)
+        return heapq.nlargest(limit, result, key=lambda c: c.score)
+
+    def _collect(self, missing_path, stems, ext, ignore_ext, expected_size):
+        result = []
+        for sim, sid in stems:
+            for idx in self._stem_files[sid]:
+                path = self.paths[idx]
+                if not ignore_ext and os.path.splitext(path)[1].lower() != ext: continue
+                result.append(Candidate(path, self.score(missing_path, path, self.sizes[idx], sim, expected_size), sim))
+        return result
+
+    def best(self, missing_path, **kwargs):
+        found = self.candidates(missing_path, limit=1, **kwargs)
+        return found[0] if found else None
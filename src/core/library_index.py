@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.core.max_metadata import read_asset_metadata
+
+SCHEMA_VERSION = 2
+
+MODEL_EXTS = (".max", ".fbx", ".obj", ".3ds")
+# Ordem de prioridade usada para escolher o arquivo principal de um asset
+MAIN_FILE_EXTS = (".max", ".fbx", ".obj", ".3ds", ".mat")
+FORMAT_EXTS = (".max", ".fbx", ".obj", ".3ds", ".skp", ".mat")
+PREVIEW_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".tga", ".tif")
+METADATA_FILE = "metadata.json"
+
+# Profundidade máxima percorrida a partir da raiz: raiz/categoria/subpasta/asset
+MAX_TREE_DEPTH = 4
+
+
+class LibraryIndex(object):
+    """Índice persistente (SQLite) da biblioteca de assets.
+
+    Cada diretório conhecido guarda o mtime da última listagem; um diretório só é
+    listado de novo quando o mtime muda ou quando o arquivo principal mudou (tamanho
+    ou mtime). Uma conexão por thread: os workers criam a sua própria instância
+    apontando para o mesmo arquivo.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        try: self.conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.Error: pass
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        with self._lock:
+            version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                # O índice é só um cache: se o formato mudou, reconstruímos do zero
+                self.conn.execute("DROP TABLE IF EXISTS folders")
+                self.conn.execute("DROP TABLE IF EXISTS deps")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS folders ("
+                " path TEXT PRIMARY KEY,"
+                " parent TEXT,"
+                " name TEXT,"
+                " mtime REAL,"          # mtime do diretório na última listagem (NULL = nunca listado)
+                " main_file TEXT,"
+                " formats TEXT,"        # extensões presentes, separadas por espaço
+                " size INTEGER,"        # tamanho do arquivo principal
+                " file_mtime REAL,"     # mtime do arquivo principal
+                " preview TEXT,"        # imagem dentro da pasta
+                " side_preview TEXT,"   # imagem irmã (pai/<nome>.jpg), tem prioridade
+                " has_meta INTEGER,"    # existe metadata.json na pasta
+                " meta_mtime REAL,"     # mtime do metadata.json quando as tags foram lidas
+                " tags TEXT"            # tags do metadata.json, uma por linha (minúsculas)
+                ")")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS deps ("
+                " path TEXT PRIMARY KEY,"   # pasta do asset
+                " main_file TEXT,"
+                " size INTEGER,"            # tamanho e mtime do .max quando foi lido
+                " file_mtime REAL,"
+                " assets TEXT"              # JSON: [{type, path}]
+                ")")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_folders_parent ON folders(parent)")
+            self.conn.execute("PRAGMA user_version = {}".format(SCHEMA_VERSION))
+            self.conn.commit()
+
+    def close(self):
+        try: self.conn.close()
+        except Exception: pass
+
+    # --------------------------------------------------------------------------
+    # Leitura
+    # --------------------------------------------------------------------------
+    def get(self, path):
+        with self._lock:
+            return self.conn.execute("SELECT * FROM folders WHERE path = ?", (path,)).fetchone()
+
+    def children(self, path):
+        with self._lock:
+            return self.conn.execute(
+                "SELECT * FROM folders WHERE parent = ? ORDER BY name COLLATE NOCASE", (path,)).fetchall()
+
+    def assets_under(self, root):
+        """Todas as pastas de asset (com arquivo principal) abaixo de `root`."""
+        prefix = root.rstrip("\\/") + os.sep
+        with self._lock:
+            return self.conn.execute(
+                "SELECT * FROM folders WHERE main_file IS NOT NULL AND substr(path, 1, ?) = ?",
+                (len(prefix), prefix)).fetchall()
+
+    @staticmethod
+    def formats_of(row):
+        return (row['formats'] or "").split() if row is not None else []
+
+    @staticmethod
+    def has_models(row):
+        return any(ext in MODEL_EXTS for ext in LibraryIndex.formats_of(row))
+
+    @staticmethod
+    def preview_of(row):
+        return row['side_preview'] or row['preview'] if row is not None else None
+
+    @staticmethod
+    def tags_of(row):
+        return (row['tags'] or "").splitlines() if row is not None else []
+
+    # --------------------------------------------------------------------------
+    # Sincronização com o disco
+    # --------------------------------------------------------------------------
+    def sync_dir(self, path, depth=1):
+        """Sincroniza `path` com o disco (stat do diretório e do arquivo principal se não
+        mudou). Filhos ainda nunca listados são sincronizados até `depth` níveis.
+        Retorna a lista de diretórios que foram (re)listados."""
+        changed = []
+        try: st = os.stat(path)
+        except OSError:
+            if self.get(path) is not None:
+                self._forget(path)
+                changed.append(path)
+            return changed
+
+        row = self.get(path)
+        if row is None or row['mtime'] != st.st_mtime or self._main_file_changed(row):
+            self._scan(path, st.st_mtime)
+            changed.append(path)
+            row = self.get(path)
+
+        if depth > 0 and not self.has_models(row):
+            with self._lock:
+                pending = [r['path'] for r in self.conn.execute(
+                    "SELECT path FROM folders WHERE parent = ? AND mtime IS NULL", (path,))]
+            for child in pending:
+                changed.extend(self.sync_dir(child, depth - 1))
+        return changed
+
+    @staticmethod
+    def _main_file_changed(row):
+        # Sobrescrever um arquivo no lugar não muda o mtime do diretório
+        if not row['main_file']: return False
+        try: st = os.stat(row['main_file'])
+        except OSError: return True
+        return st.st_size != row['size'] or st.st_mtime != row['file_mtime']
+
+    def refresh_tree(self, root, max_depth=MAX_TREE_DEPTH, should_stop=None):
+        """Revalida a árvore inteira comparando o mtime de cada diretório.
+        Apenas diretórios alterados são listados novamente."""
+        changed = []
+        stack = [(root, 0)]
+        while stack:
+            if should_stop and should_stop(): break
+            path, depth = stack.pop()
+            changed.extend(self.sync_dir(path, depth=0))
+            row = self.get(path)
+            if row is None or depth >= max_depth or self.has_models(row): continue
+            for child in self.children(path):
+                stack.append((child['path'], depth + 1))
+        return changed
+
+    def refresh_metadata(self, root, should_stop=None):
+        """Relê as tags dos metadata.json cujo mtime mudou. Retorna quantos foram relidos."""
+        prefix = root.rstrip("\\/") + os.sep
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT path, meta_mtime FROM folders WHERE has_meta = 1 AND substr(path, 1, ?) = ?",
+                (len(prefix), prefix)).fetchall()
+        updated = 0
+        for row in rows:
+            if should_stop and should_stop(): break
+            meta_path = os.path.join(row['path'], METADATA_FILE)
+            try: mtime = os.stat(meta_path).st_mtime
+            except OSError:
+                with self._lock:
+                    self.conn.execute("UPDATE folders SET has_meta = 0, meta_mtime = NULL, tags = NULL WHERE path = ?", (row['path'],))
+                updated += 1
+                continue
+            if mtime == row['meta_mtime']: continue
+            tags = self._read_tags(meta_path)
+            with self._lock:
+                self.conn.execute("UPDATE folders SET meta_mtime = ?, tags = ? WHERE path = ?", (mtime, "\n".join(tags), row['path']))
+            updated += 1
+            if updated % 200 == 0:
+                with self._lock: self.conn.commit()
+        with self._lock: self.conn.commit()
+        return updated
+
+    # --------------------------------------------------------------------------
+    # Dependências (.max lido em Python, src/core/max_metadata.py)
+    # --------------------------------------------------------------------------
+    def get_dependencies(self, path):
+        """[{type, path}] do arquivo principal do asset, ou None se não lido/desatualizado."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT d.assets FROM deps d JOIN folders f ON f.path = d.path"
+                " WHERE d.path = ? AND d.main_file = f.main_file AND d.size = f.size AND d.file_mtime = f.file_mtime",
+                (path,)).fetchone()
+        return json.loads(row['assets']) if row else None
+
+    def set_dependencies(self, path, main_file, size, file_mtime, assets, commit=True):
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO deps (path, main_file, size, file_mtime, assets) VALUES (?, ?, ?, ?, ?)",
+                              (path, main_file, size, file_mtime, json.dumps(assets, ensure_ascii=False)))
+            if commit: self.conn.commit()
+
+    @staticmethod
+    def read_dependencies(main_file):
+        try: return [{'type': a.type, 'path': a.path} for a in read_asset_metadata(main_file)]
+        except Exception: return None
+
+    def refresh_dependencies(self, root, should_stop=None, workers=8):
+        """Lê (em paralelo) o manifesto dos .max novos ou alterados abaixo de `root`. Retorna quantos."""
+        prefix = root.rstrip("\\/") + os.sep
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT f.path, f.main_file, f.size, f.file_mtime FROM folders f LEFT JOIN deps d ON d.path = f.path"
+                " WHERE f.main_file LIKE '%.max' AND substr(f.path, 1, ?) = ?"
+                " AND (d.path IS NULL OR d.main_file != f.main_file OR d.size != f.size OR d.file_mtime != f.file_mtime)",
+                (len(prefix), prefix)).fetchall()
+        if not rows: return 0
+
+        def read(row):
+            if should_stop and should_stop(): return row, None, None
+            # A chave é o stat de agora: se a linha da pasta estiver atrasada, o manifesto
+            # só passa a valer quando sync_dir a atualizar para o mesmo arquivo
+            try: st = os.stat(row['main_file'])
+            except OSError: return row, None, None
+            return row, st, self.read_dependencies(row['main_file'])
+
+        updated = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for row, st, assets in pool.map(read, rows):
+                if assets is None: continue
+                self.set_dependencies(row['path'], row['main_file'], st.st_size, st.st_mtime, assets, commit=False)
+                updated += 1
+                if updated % 200 == 0:
+                    with self._lock: self.conn.commit()
+        with self._lock: self.conn.commit()
+        return updated
+
+    @staticmethod
+    def _read_tags(meta_path):
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return [str(t).strip().lower() for t in data.get('tags', []) if str(t).strip()]
+        except Exception: return []
+
+    def _scan(self, path, dir_mtime):
+        subdirs = []
+        best = {}
+        formats = set()
+        images = {}
+        first_image = None
+        has_meta = False
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            subdirs.append(entry.name)
+                            continue
+                        if not entry.is_file(): continue
+                        if entry.name.lower() == METADATA_FILE: has_meta = True
+                        stem, ext = os.path.splitext(entry.name)
+                        ext = ext.lower()
+                        if ext in FORMAT_EXTS: formats.add(ext)
+                        if ext in PREVIEW_EXTS:
+                            images.setdefault(stem.lower(), entry.path)
+                            if first_image is None: first_image = entry.path
+                        if ext in MAIN_FILE_EXTS:
+                            st = entry.stat()
+                            if ext not in best or st.st_mtime > best[ext][1]:
+                                best[ext] = (entry.path, st.st_mtime, st.st_size)
+                    except OSError: pass
+        except OSError: return
+
+        main = next((best[ext] for ext in MAIN_FILE_EXTS if ext in best), None)
+        parent = os.path.dirname(path)
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO folders (path, parent, name) VALUES (?, ?, ?)",
+                (path, parent, os.path.basename(path)))
+            self.conn.execute(
+                "UPDATE folders SET mtime = ?, main_file = ?, formats = ?, size = ?, file_mtime = ?, preview = ? WHERE path = ?",
+                (dir_mtime, main[0] if main else None, " ".join(sorted(formats)),
+                 main[2] if main else None, main[1] if main else None, first_image, path))
+            if has_meta:
+                self.conn.execute("UPDATE folders SET has_meta = 1 WHERE path = ?", (path,))
+            else:
+                self.conn.execute("UPDATE folders SET has_meta = 0, meta_mtime = NULL, tags = NULL WHERE path = ?", (path,))
+
+            known = set(r['path'] for r in self.conn.execute("SELECT path FROM folders WHERE parent = ?", (path,)))
+            current = set()
+            for name in subdirs:
+                child = os.path.join(path, name)
+                current.add(child)
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO folders (path, parent, name) VALUES (?, ?, ?)", (child, path, name))
+                self.conn.execute(
+                    "UPDATE folders SET side_preview = ? WHERE path = ?", (images.get(name.lower()), child))
+            for gone in known - current:
+                self._forget(gone, commit=False)
+            self.conn.commit()
+
+    def _forget(self, path, commit=True):
+        prefix = path.rstrip("\\/") + os.sep
+        with self._lock:
+            self.conn.execute(
+                "DELETE FROM folders WHERE path = ? OR substr(path, 1, ?) = ?", (path, len(prefix), prefix))
+            self.conn.execute(
+                "DELETE FROM deps WHERE path = ? OR substr(path, 1, ?) = ?", (path, len(prefix), prefix))
+            if commit: self.conn.commit()
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""Leitura das dependências (texturas, xrefs, IES...) de um .max sem o 3ds Max.
+
+O .max é um documento composto OLE (CFB). O Max grava a lista de assets do arquivo
+no stream `FileAssetMetaData2`/`FileAssetMetaData3`: registros com GUID, tipo e
+caminho, os textos em UTF-16 precedidos do tamanho. É o mesmo dado que
+`getMAXFileAssetMetadata` devolve, só que aqui dá para ler numa thread qualquer
+(nenhuma chamada ao pymxs) e só os setores desse stream são lidos do disco.
+"""
+import os
+import struct
+from collections import namedtuple
+
+from src.core.fuzzy_match import IMAGE_EXTS
+
+CFB_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+METADATA_STREAMS = ("FileAssetMetaData3", "FileAssetMetaData2")
+SUMMARY_STREAM = "\x05DocumentSummaryInformation"
+END_OF_CHAIN = 0xFFFFFFFE
+MAX_STRING = 2048
+
+# Extensões que dependem dos bitmap paths do Max para serem achadas
+BITMAP_EXTS = IMAGE_EXTS | frozenset((".ies", ".hdri", ".gif", ".jpe", ".rgb", ".cin", ".vrmap", ".vrlmap"))
+
+# Marcas de cada renderer: nomes (plug-ins/Render Data do resumo, caminhos) e extensões de assets
+RENDERER_NAMES = (("vray", ("vray", "v-ray", "v_ray")), ("corona", ("corona",)),
+                  ("fstorm", ("fstorm",)), ("arnold", ("arnold",)))
+RENDERER_EXTS = {".vrmesh": "vray", ".vrmap": "vray", ".vrlmap": "vray", ".vrscene": "vray", ".vrimg": "vray",
+                 ".cgeo": "corona", ".cxr": "corona", ".ass": "arnold", ".tx": "arnold"}
+
+Asset = namedtuple("Asset", "type path")
+
+
+class CompoundFileError(Exception): pass
+
+
+class CompoundFile(object):
+    """Leitor mínimo de CFB: diretório na abertura, FAT lida sob demanda por setor."""
+
+    def __init__(self, path):
+        self.f = open(path, 'rb')
+        try: self._read_header()
+        except Exception:
+            self.f.close()
+            raise
+
+    def close(self): self.f.close()
+
+    def __enter__(self): return self
+
+    def __exit__(self, *args): self.close()
+
+    def _read_header(self):
+        header = self.f.read(512)
+        if len(header) < 512 or header[:8] != CFB_SIGNATURE: raise CompoundFileError("não é um documento OLE")
+        self.sector_size = 1 << struct.unpack_from("<H", header, 0x1E)[0]
+        self.mini_size = 1 << struct.unpack_from("<H", header, 0x20)[0]
+        first_dir, = struct.unpack_from("<I", header, 0x30)
+        self.mini_cutoff, first_minifat, num_minifat, first_difat, num_difat = struct.unpack_from("<IIIII", header, 0x38)
+        self.per_sector = self.sector_size // 4
+
+        # Localização dos setores da FAT (DIFAT): 109 no header + setores DIFAT encadeados
+        fat_sectors = [s for s in struct.unpack_from("<109I", header, 0x4C) if s < END_OF_CHAIN]
+        sector = first_difat
+        for _ in range(num_difat):
+            if sector >= END_OF_CHAIN: break
+            entries = struct.unpack("<{}I".format(self.per_sector), self._sector(sector))
+            fat_sectors.extend(s for s in entries[:-1] if s < END_OF_CHAIN)
+            sector = entries[-1]
+        self.fat_sectors = fat_sectors
+        self._fat = {}
+
+        self.entries = []
+        directory = self._read_chain(first_dir)
+        for off in range(0, len(directory) - 127, 128):
+            raw = directory[off:off + 128]
+            name_len, kind = struct.unpack_from("<HB", raw, 64)
+            if kind == 0: continue
+            name = raw[:max(0, name_len - 2)].decode('utf-16-le', 'replace')
+            start, size = struct.unpack_from("<IQ", raw, 116)
+            if self.sector_size == 512: size &= 0xFFFFFFFF
+            self.entries.append((name, kind, start, size))
+        self._minifat = None
+        self._mini_stream = None
+        self._first_minifat = first_minifat if num_minifat else END_OF_CHAIN
+
+    def _sector(self, sector):
+        self.f.seek((sector + 1) * self.sector_size)
+        return self.f.read(self.sector_size)
+
+    def _next(self, sector):
+        page = sector // self.per_sector
+        table = self._fat.get(page)
+        if table is None:
+            if page >= len(self.fat_sectors): raise CompoundFileError("FAT truncada")
+            table = self._fat[page] = struct.unpack("<{}I".format(self.per_sector), self._sector(self.fat_sectors[page]))
+        return table[sector % self.per_sector]
+
+    def _read_chain(self, start, size=None):
+        chunks, sector, seen = [], start, 0
+        limit = (size // self.sector_size + 1) if size is not None else 1 << 20
+        while sector < END_OF_CHAIN and seen <= limit:
+            chunks.append(self._sector(sector))
+            sector = self._next(sector)
+            seen += 1
+        data = b"".join(chunks)
+        return data[:size] if size is not None else data
+
+    def _read_mini(self, start, size):
+        if self._minifat is None:
+            raw = self._read_chain(self._first_minifat) if self._first_minifat < END_OF_CHAIN else b""
+            self._minifat = struct.unpack("<{}I".format(len(raw) // 4), raw[:len(raw) // 4 * 4])
+            root = next((e for e in self.entries if e[1] == 5), None)
+            self._mini_stream = self._read_chain(root[2], root[3]) if root else b""
+        chunks, sector, seen = [], start, 0
+        while sector < END_OF_CHAIN and sector < len(self._minifat) and seen <= size // self.mini_size + 1:
+            off = sector * self.mini_size
+            chunks.append(self._mini_stream[off:off + self.mini_size])
+            sector = self._minifat[sector]
+            seen += 1
+        return b"".join(chunks)[:size]
+
+    def stream_names(self):
+        return [e[0] for e in self.entries if e[1] == 2]
+
+    def read_stream(self, name):
+        """Conteúdo do stream `name` (sem caixa) ou None se não existir."""
+        entry = next((e for e in self.entries if e[1] == 2 and e[0].lower() == name.lower()), None)
+        if entry is None: return None
+        _, _, start, size = entry
+        if size < self.mini_cutoff: return self._read_mini(start, size)
+        return self._read_chain(start, size)
+
+
+def _utf16_strings(data):
+    """Textos UTF-16 precedidos do tamanho (uint32, em caracteres), na ordem do stream."""
+    found, pos, end = [], 0, len(data) - 4
+    while pos <= end:
+        n, = struct.unpack_from("<I", data, pos)
+        if 0 < n <= MAX_STRING and pos + 4 + 2 * n <= len(data):
+            try: text = data[pos + 4:pos + 4 + 2 * n].decode('utf-16-le')
+            except UnicodeDecodeError: text = None
+            text = text.rstrip("\0") if text else text
+            if text and text.isprintable():
+                found.append(text)
+                pos += 4 + 2 * n
+                continue
+        pos += 1
+    return found
+
+
+def parse_asset_metadata(data):
+    """Lista de Asset(tipo, caminho) de um stream FileAssetMetaData. Cada caminho vem
+    depois do seu tipo (`Bitmap`, `XRef`, `Photometric`...)."""
+    assets, kind, seen = [], "Other", set()
+    for text in _utf16_strings(data):
+        if "\\" not in text and "/" not in text and not os.path.splitext(text)[1]:
+            kind = text
+            continue
+        if text.lower() not in seen:
+            seen.add(text.lower())
+            assets.append(Asset(kind, text))
+    return assets
+
+
+def read_asset_metadata(max_path):
+    """Assets referenciados pelo .max (lista vazia se o arquivo não tiver o stream)."""
+    with CompoundFile(max_path) as cf:
+        for name in METADATA_STREAMS:
+            data = cf.read_stream(name)
+            if data: return parse_asset_metadata(data)
+    return []
+
+
+def dependency_manifest(max_path):
+    """Manifesto de dependências serializável em JSON."""
+    st = os.stat(max_path)
+    assets = read_asset_metadata(max_path)
+    return {'file': max_path, 'size': st.st_size, 'mtime': st.st_mtime,
+            'assets': [{'type': a.type, 'path': a.path} for a in assets]}
+
+
+def is_bitmap(path):
+    return os.path.splitext(path)[1].lower() in BITMAP_EXTS
+
+
+def resolve_dependencies(asset_folder, assets, max_depth=2):
+    """Onde estão as texturas de um asset: (pastas para os bitmap paths, caminhos não achados).
+
+    Caminho absoluto que existe não precisa de pasta extra; os demais são procurados
+    pelo nome dentro da pasta do asset (até `max_depth` níveis, uma listagem só).
+    """
+    names = {}
+    stack = [(asset_folder, 0)]
+    while stack:
+        folder, depth = stack.pop()
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            if depth < max_depth: stack.append((entry.path, depth + 1))
+                        else: names.setdefault(entry.name.lower(), folder)
+                    except OSError: pass
+        except OSError: pass
+
+    dirs, missing = [], []
+    for asset in assets:
+        path = asset['path'] if isinstance(asset, dict) else asset.path
+        if not is_bitmap(path): continue
+        if os.path.isabs(path) and os.path.isfile(path): continue
+        folder = names.get(path.replace("\\", "/").rsplit("/", 1)[-1].lower())
+        if folder is None: missing.append(path)
+        elif folder not in dirs: dirs.append(folder)
+    return dirs, missing
+
+
+def _renderer_label(found):
+    if "vray" in found and "corona" in found: return "V-Ray & Corona"
+    for key, label in (("vray", "V-Ray"), ("corona", "Corona Render"), ("fstorm", "FStorm"), ("arnold", "Arnold")):
+        if key in found: return label
+    return "Unknown"
+
+
+def guess_renderer(max_path):
+    """Mesmo resultado do `guessRenderer` do MaxScript, sem o Max: procura as marcas dos
+    renderers no resumo do documento (plug-ins usados, Render Data), nos assets e no caminho."""
+    if os.path.splitext(max_path)[1].lower() != ".max": return "N/A"
+    texts, found = [max_path.lower()], set()
+    try:
+        with CompoundFile(max_path) as cf:
+            summary = cf.read_stream(SUMMARY_STREAM) or b""
+            texts.append(summary.decode('latin-1').lower())
+            texts.append(summary.decode('utf-16-le', 'ignore').lower())
+            for name in METADATA_STREAMS:
+                data = cf.read_stream(name)
+                if not data: continue
+                for asset in parse_asset_metadata(data):
+                    texts.append(asset.path.lower())
+                    ext = RENDERER_EXTS.get(os.path.splitext(asset.path)[1].lower())
+                    if ext: found.add(ext)
+                break
+    except (OSError, CompoundFileError, struct.error): pass
+    for key, names in RENDERER_NAMES:
+        if any(n in t for t in texts for n in names): found.add(key)
+    return _renderer_label(found)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+import zipfile
+
+from src.core.file_copy import CHUNK_SIZE
+
+MAPS_FOLDER = "maps"
+
+# Formatos que já vêm comprimidos: vão sem deflate (mesmo tamanho, muito mais rápido)
+STORED_EXTS = frozenset((".jpg", ".jpeg", ".png", ".exr", ".gif", ".webp", ".zip", ".rar", ".7z", ".mp4", ".mov", ".avi", ".tx", ".dds"))
+
+
+def archive_names(paths, folder=MAPS_FOLDER):
+    """{origem: nome relativo no pacote} (`maps/nome.ext`, `maps/nome_1.ext` nas colisões).
+    Comparação sem caixa, como no Windows."""
+    names, taken = {}, set()
+    for src in paths:
+        if src in names: continue
+        stem, ext = os.path.splitext(src.replace("\\", "/").rsplit("/", 1)[-1])
+        n = 0
+        while True:
+            name = "{}/{}".format(folder, "{}_{}{}".format(stem, n, ext) if n else stem + ext)
+            if name.lower() not in taken: break
+            n += 1
+        taken.add(name.lower())
+        names[src] = name
+    return names
+
+
+def max_relative(name):
+    """Caminho gravado na cópia do .max: relativo ao próprio .max na raiz do pacote."""
+    return name.replace("/", "\\")
+
+
+class ScenePacker(object):
+    """Grava a cena e os arquivos dela direto num .zip (Pack & Go), lendo e escrevendo
+    em blocos: nada é copiado para uma pasta intermediária. O arquivo é montado em
+    `<destino>.part` e só renomeado no fim; cancelado, o .part é apagado.
+    `progress` recebe (bytes lidos, total de bytes, arquivos prontos, total, bytes/s).
+    """
+    PROGRESS_INTERVAL = 0.2
+
+    def __init__(self, archive_path):
+        self.archive_path = archive_path
+
+    def pack(self, entries, should_stop=None, progress=None):
+        """`entries` = [(caminho no disco, nome no pacote)]. Retorna um dict com files,
+        bytes, missing, errors e cancelled."""
+        todo, missing = [], []
+        for path, name in entries:
+            try: todo.append((path, name, os.path.getsize(path)))
+            except OSError: missing.append(path)
+        total = sum(t[2] for t in todo)
+        state = {'bytes': 0, 'last': 0.0}
+        start = time.time()
+        errors, done = [], 0
+        stopped = lambda: bool(should_stop and should_stop())
+
+        def report(files, force=False):
+            now = time.time()
+            if not progress or (not force and now - state['last'] < self.PROGRESS_INTERVAL): return
+            state['last'] = now
+            progress(state['bytes'], total, files, len(todo), state['bytes'] / max(now - start, 1e-6))
+
+        part = self.archive_path + ".part"
+        try:
+            with zipfile.ZipFile(part, 'w', allowZip64=True) as zf:
+                for path, name, size in todo:
+                    if stopped(): break
+                    info = zipfile.ZipInfo.from_file(path, name)
+                    info.compress_type = zipfile.ZIP_STORED if os.path.splitext(name)[1].lower() in STORED_EXTS else zipfile.ZIP_DEFLATED
+                    try:
+                        with open(path, 'rb') as fin, zf.open(info, 'w', force_zip64=size > 0x7fffffff) as fout:
+                            while True:
+                                chunk = fin.read(CHUNK_SIZE)
+                                if not chunk: break
+                                fout.write(chunk)
+                                state['bytes'] += len(chunk)
+                                report(done)
+                                if stopped(): break
+                    except (OSError, IOError) as e:
+                        errors.append((path, str(e)))
+                        continue
+                    done += 1
+            cancelled = stopped()
+            if cancelled: os.remove(part)
+            else: os.replace(part, self.archive_path)
+        except Exception:
+            try: os.remove(part)
+            except OSError: pass
+            raise
+        report(done, force=True)
+        return {'files': done, 'bytes': state['bytes'], 'missing': missing, 'errors': errors, 'cancelled': cancelled}
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+import sqlite3
+import threading
+
+from src.core.crawler import ParallelCrawler, DEFAULT_WORKERS, list_dir
+
+SCHEMA_VERSION = 1
+
+
+def file_key(name):
+    """Chave de busca do relink: nome sem extensão, minúsculo."""
+    return os.path.splitext(name.lower())[0]
+
+
+class RelinkIndex(object):
+    """Índice persistente (SQLite) dos arquivos das pastas usadas no relink.
+
+    Guarda nome -> caminhos e o mtime de cada diretório na última listagem. Um
+    refresh só lista de novo os diretórios cujo mtime mudou; os outros custam um
+    stat (feitos em paralelo pelo ParallelCrawler). Uma conexão por thread: o
+    worker abre a sua própria instância.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        try: self.conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.Error: pass
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        with self._lock:
+            version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                # Só um cache: formato novo, reconstrói do zero
+                self.conn.execute("DROP TABLE IF EXISTS dirs")
+                self.conn.execute("DROP TABLE IF EXISTS files")
+                self.conn.execute("DROP TABLE IF EXISTS roots")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS dirs ("
+                " path TEXT PRIMARY KEY,"
+                " parent TEXT,"
+                " mtime REAL"           # mtime do diretório na última listagem
+                ")")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                " dir TEXT,"
+                " name TEXT,"
+                " key TEXT,"            # nome sem extensão, minúsculo
+                " size INTEGER,"
+                " mtime REAL,"
+                " PRIMARY KEY (dir, name)"
+                ")")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS roots ("
+                " path TEXT PRIMARY KEY,"
+                " refreshed REAL"       # fim do último refresh completo
+                ")")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_dirs_parent ON dirs(parent)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_files_key ON files(key)")
+            self.conn.execute("PRAGMA user_version = {}".format(SCHEMA_VERSION))
+            self.conn.commit()
+
+    def close(self):
+        try: self.conn.close()
+        except Exception: pass
+
+    @staticmethod
+    def _prefix(root):
+        return root.rstrip("\\/") + os.sep
+
+    # --------------------------------------------------------------------------
+    # Leitura
+    # --------------------------------------------------------------------------
+    def last_refresh(self, root):
+        with self._lock:
+            row = self.conn.execute("SELECT refreshed FROM roots WHERE path = ?", (root,)).fetchone()
+        return row['refreshed'] if row else None
+
+    def lookup(self, key, root=None):
+        """(caminho, tamanho) dos arquivos com essa chave (opcionalmente só abaixo de `root`)."""
+        with self._lock:
+            rows = self.conn.execute("SELECT dir, name, size FROM files WHERE key = ?", (key,)).fetchall()
+        found = [(os.path.join(r['dir'], r['name']), r['size']) for r in rows]
+        if root:
+            prefix = self._prefix(root)
+            found = [f for f in found if f[0].startswith(prefix)]
+        return found
+
+    def file_dict(self, root, include_subfolders=True):
+        """{chave: [caminhos]} de tudo o que está indexado em `root`."""
+        prefix = self._prefix(root)
+        with self._lock:
+            if include_subfolders:
+                rows = self.conn.execute(
+                    "SELECT dir, name, key FROM files WHERE dir = ? OR substr(dir, 1, ?) = ?",
+                    (root, len(prefix), prefix)).fetchall()
+            else:
+                rows = self.conn.execute("SELECT dir, name, key FROM files WHERE dir = ?", (root,)).fetchall()
+        result = {}
+        for r in rows:
+            result.setdefault(r['key'], []).append(os.path.join(r['dir'], r['name']))
+        return result
+
+    def iter_files(self, root, include_subfolders=True):
+        """(caminho, tamanho) de cada arquivo indexado em `root`."""
+        prefix = self._prefix(root)
+        with self._lock:
+            if include_subfolders:
+                cursor = self.conn.execute(
+                    "SELECT dir, name, size FROM files WHERE dir = ? OR substr(dir, 1, ?) = ?", (root, len(prefix), prefix))
+            else:
+                cursor = self.conn.execute("SELECT dir, name, size FROM files WHERE dir = ?", (root,))
+            rows = cursor.fetchall()
+        for r in rows: yield os.path.join(r['dir'], r['name']), r['size']
+
+    def file_count(self, root):
+        prefix = self._prefix(root)
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM files WHERE dir = ? OR substr(dir, 1, ?) = ?",
+                (root, len(prefix), prefix)).fetchone()[0]
+
+    # --------------------------------------------------------------------------
+    # Sincronização com o disco
+    # --------------------------------------------------------------------------
+    def _known_dirs(self, root):
+        """mtime e subdiretórios conhecidos de cada diretório abaixo de `root` (uma consulta)."""
+        prefix = self._prefix(root)
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT path, parent, mtime FROM dirs WHERE path = ? OR substr(path, 1, ?) = ?",
+                (root, len(prefix), prefix)).fetchall()
+        mtimes, children = {}, {}
+        for r in rows:
+            mtimes[r['path']] = r['mtime']
+            children.setdefault(r['parent'], []).append(r['path'])
+        return mtimes, children
+
+    def refresh(self, root, include_subfolders=True, should_stop=None, progress=None, workers=DEFAULT_WORKERS):
+        """Atualiza o índice de `root` com o crawler paralelo. `progress` recebe
+        (pastas, arquivos lidos, pastas/s, arquivos/s). Retorna (listados, reaproveitados)."""
+        listed = reused = 0
+        for path, mtime, files, subdirs in self.refresh_iter(root, include_subfolders, should_stop, progress, workers):
+            if files is None: reused += 1
+            else: listed += 1
+        return listed, reused
+
+    def refresh_iter(self, root, include_subfolders=True, should_stop=None, progress=None, workers=DEFAULT_WORKERS):
+        """Gerador do refresh: produz (pasta, mtime, arquivos, subpastas) por diretório
+        visitado. `arquivos` é None quando a pasta não mudou (conteúdo já indexado)."""
+        mtimes, children = self._known_dirs(root)
+
+        def visit(path):
+            # Roda nas threads do crawler: só lê `mtimes`/`children`, não toca no SQLite
+            try: st = os.stat(path)
+            except OSError: return (path, None, None, []), [], 0
+            if mtimes.get(path) == st.st_mtime:
+                subdirs = children.get(path, [])
+                return (path, st.st_mtime, None, subdirs), subdirs, 0
+            try: files, subdirs = list_dir(path)
+            except OSError: return (path, None, None, []), [], 0
+            return (path, st.st_mtime, files, subdirs), subdirs, len(files)
+
+        crawler = ParallelCrawler(workers, progress, should_stop)
+        last_commit = time.time()
+        complete = False
+        try:
+            for path, mtime, files, subdirs in crawler.crawl([root], visit, include_subfolders):
+                if mtime is None:
+                    if path in mtimes: self._forget(path, commit=False)
+                    continue
+                if files is not None:
+                    rows = [(path, name, file_key(name), size, fmtime) for name, size, fmtime in files]
+                    self.store_dir(path, mtime, rows, subdirs, children.get(path, []), commit=False)
+                if time.time() - last_commit > 1.0:
+                    with self._lock: self.conn.commit()
+                    last_commit = time.time()
+                yield path, mtime, files, subdirs
+            complete = not (should_stop and should_stop())
+        finally:
+            with self._lock: self.conn.commit()
+        if complete: self._mark_refreshed(root)
+
+    def store_dir(self, path, dir_mtime, files, subdirs, known_subdirs=(), commit=True):
+        """Grava a listagem de um diretório; `files` = [(dir, nome, chave, tamanho, mtime)]."""
+        with self._lock:
+            parent = os.path.dirname(path)
+            self.conn.execute("INSERT OR REPLACE INTO dirs (path, parent, mtime) VALUES (?, ?, ?)", (path, parent, dir_mtime))
+            self.conn.execute("DELETE FROM files WHERE dir = ?", (path,))
+            self.conn.executemany("INSERT INTO files (dir, name, key, size, mtime) VALUES (?, ?, ?, ?, ?)", files)
+            current = set(subdirs)
+            for gone in known_subdirs:
+                if gone not in current: self._forget(gone, commit=False)
+            if commit: self.conn.commit()
+
+    def _forget(self, path, commit=True):
+        prefix = self._prefix(path)
+        with self._lock:
+            self.conn.execute("DELETE FROM dirs WHERE path = ? OR substr(path, 1, ?) = ?", (path, len(prefix), prefix))
+            self.conn.execute("DELETE FROM files WHERE dir = ? OR substr(dir, 1, ?) = ?", (path, len(prefix), prefix))
+            if commit: self.conn.commit()
+
+    def _mark_refreshed(self, root):
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO roots (path, refreshed) VALUES (?, ?)", (root, time.time()))
+            self.conn.commit()
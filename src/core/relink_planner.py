@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""Planejador de relink, sem 3ds Max nem Qt.
+
+Recebe a lista de arquivos faltando e a pasta onde procurar, e devolve um plano
+(faltando -> novo caminho, com confiança) serializável em JSON. A janela só aplica
+o plano; o mesmo código roda na linha de comando para pré-calcular planos ou medir:
+
+    python -m src.core.relink_planner --root //srv/texturas --missing faltando.txt --out plano.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+from src.core.relink_index import RelinkIndex, file_key
+from src.core.fuzzy_match import FuzzyIndex, base_name
+
+PLAN_VERSION = 1
+
+
+class RelinkPlan(object):
+    """Resultado do planner. Cada entrada: missing, new, confidence (0-1),
+    method ('exact' | 'fuzzy') e alternatives ([caminho, confiança])."""
+
+    def __init__(self, root, entries=None, unmatched=None, stats=None):
+        self.root = root
+        self.entries = entries or []
+        self.unmatched = unmatched or []
+        self.stats = stats or {}
+
+    def __len__(self): return len(self.entries)
+
+    def mapping(self, min_confidence=0.0):
+        """{faltando: novo} das entradas com confiança suficiente."""
+        return dict((e['missing'], e['new']) for e in self.entries if e['confidence'] >= min_confidence)
+
+    def count(self, method):
+        return sum(1 for e in self.entries if e['method'] == method)
+
+    def to_dict(self):
+        return {'version': PLAN_VERSION, 'root': self.root, 'created': time.time(),
+                'entries': self.entries, 'unmatched': self.unmatched, 'stats': self.stats}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('root', ""), data.get('entries', []), data.get('unmatched', []), data.get('stats', {}))
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+class RelinkPlanner(object):
+    """Casa arquivos faltando com arquivos existentes.
+
+    1. Nome idêntico no índice de relink persistido (conferido com um stat).
+    2. Atualização incremental do índice, casando cada diretório relistado assim que
+       chega; para assim que todo arquivo faltando tem ao menos um candidato (com
+       `exhaustive`, só quando todos juntaram MAX_CANDIDATES ou a árvore acabou).
+    3. Nomes parecidos (FuzzyIndex) para o que ficou sem nenhum candidato.
+    Os arquivos com o mesmo nome achados até parar são guardados (até MAX_CANDIDATES)
+    e vence o de melhor ranking (FuzzyIndex.score); os seguintes viram `alternatives`.
+    """
+    MIN_SIMILARITY = 0.7
+    ALTERNATIVES = 3
+    MAX_CANDIDATES = 8
+
+    def __init__(self, missing_paths, ignore_ext=False, fuzzy=True, min_similarity=MIN_SIMILARITY, exhaustive=False):
+        self.missing_paths = sorted(set(missing_paths))
+        self.ignore_ext = ignore_ext
+        self.fuzzy = fuzzy
+        self.min_similarity = min_similarity
+        self.exhaustive = exhaustive
+        self.candidates = {}    # faltando -> {caminho: tamanho} com o mesmo nome
+        self.wanted = {}        # chave -> caminhos faltando que ainda aceitam candidatos
+        self.pending = set(self.missing_paths)  # faltando ainda sem nenhum candidato
+        for path in self.missing_paths:
+            self.wanted.setdefault(file_key(base_name(path)), []).append(path)
+        self.stats = {'missing': len(self.missing_paths)}
+
+    def found_count(self): return len(self.candidates)
+
+    def satisfied(self):
+        """Nada mais a procurar no crawl."""
+        return not self.wanted if self.exhaustive else not self.pending
+
+    def add_files(self, found):
+        """Casa (caminho, tamanho) de arquivos existentes. Retorna True se achou algo novo.
+        Um caminho faltando só sai de `wanted` quando junta MAX_CANDIDATES candidatos."""
+        new = False
+        for cand, size in found:
+            key = file_key(base_name(cand))
+            missing = self.wanted.get(key)
+            if not missing: continue
+            ext = os.path.splitext(cand)[1].lower()
+            for path in list(missing):
+                if self.ignore_ext or os.path.splitext(path)[1].lower() == ext:
+                    cands = self.candidates.setdefault(path, {})
+                    if cand in cands: continue
+                    cands[cand] = size
+                    self.pending.discard(path)
+                    new = True
+                    if len(cands) >= self.MAX_CANDIDATES: missing.remove(path)
+            if not missing: del self.wanted[key]
+        return new
+
+    def _ranked(self, path, cands):
+        ranked = [(FuzzyIndex.score(path, c, size or 0, 1.0), c) for c, size in cands.items()]
+        ranked.sort(key=lambda r: -r[0])
+        return ranked
+
+    def best_matches(self):
+        return dict((path, self._ranked(path, cands)[0][1]) for path, cands in self.candidates.items())
+
+    def run(self, relink_index, root, include_subfolders=True, refresh=True,
+            should_stop=None, progress=None, on_partial=None):
+        """Executa o plano completo sobre `root` e retorna um RelinkPlan."""
+        start = time.time()
+        stopped = lambda: bool(should_stop and should_stop())
+
+        # 1. O que já está indexado
+        for key in list(self.wanted):
+            known = relink_index.lookup(key, root if include_subfolders else None)
+            if not include_subfolders: known = [f for f in known if os.path.dirname(f[0]) == root]
+            self.add_files([f for f in known if os.path.isfile(f[0])])
+        if on_partial: on_partial(self)
+        self.stats['index_seconds'] = round(time.time() - start, 3)
+
+        # 2. Refresh incremental casando o que for relistado
+        listed = reused = 0
+        if refresh and not self.satisfied():
+            crawl_start = time.time()
+            stop = lambda: stopped() or self.satisfied()
+            for path, mtime, files, subdirs in relink_index.refresh_iter(root, include_subfolders, stop, progress):
+                if files is None:
+                    reused += 1
+                    continue
+                listed += 1
+                if self.add_files([(os.path.join(path, name), size) for name, size, _ in files]) and on_partial:
+                    on_partial(self)
+                if self.satisfied(): break
+            self.stats['crawl_seconds'] = round(time.time() - crawl_start, 3)
+        self.stats['dirs_listed'] = listed
+        self.stats['dirs_reused'] = reused
+
+        entries = []
+        for path, cands in sorted(self.candidates.items()):
+            ranked = self._ranked(path, cands)
+            entries.append({'missing': path, 'new': ranked[0][1], 'confidence': round(ranked[0][0], 3), 'method': 'exact',
+                            'alternatives': [[c, round(s, 3)] for s, c in ranked[1:self.ALTERNATIVES + 1]]})
+
+        # 3. Nomes parecidos para o que ficou sem candidato
+        unmatched = sorted(p for paths in self.wanted.values() for p in paths if p not in self.candidates)
+        if self.fuzzy and unmatched and not stopped():
+            fuzzy_start = time.time()
+            fuzzy_index = FuzzyIndex.from_relink_index(relink_index, root, include_subfolders)
+            still = []
+            for path in unmatched:
+                if stopped():
+                    still.append(path)
+                    continue
+                found = fuzzy_index.candidates(path, limit=self.ALTERNATIVES + 1, min_similarity=self.min_similarity, ignore_ext=self.ignore_ext)
+                if not found:
+                    still.append(path)
+                    continue
+                entries.append({'missing': path, 'new': found[0].path, 'confidence': round(found[0].score, 3), 'method': 'fuzzy',
+                                'alternatives': [[c.path, round(c.score, 3)] for c in found[1:]]})
+            unmatched = still
+            self.stats['fuzzy_index_files'] = len(fuzzy_index)
+            self.stats['fuzzy_seconds'] = round(time.time() - fuzzy_start, 3)
+
+        entries.sort(key=lambda e: e['missing'])
+        self.stats['matched'] = len(entries)
+        self.stats['seconds'] = round(time.time() - start, 3)
+        return RelinkPlan(root, entries, unmatched, dict(self.stats))
+
+
+def default_db_path():
+    return os.path.join(tempfile.gettempdir(), "NoobTools_relink_index.db")
+
+
+def read_missing(path):
+    """Lista de faltando: JSON (lista) ou texto com um caminho por linha ('-' = stdin)."""
+    if path == "-": text = sys.stdin.read()
+    else:
+        with open(path, 'r', encoding='utf-8') as f: text = f.read()
+    if text.lstrip().startswith("["): return [p for p in json.loads(text) if p]
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.core.relink_planner", description="Gera um plano de relink (JSON) sem abrir o 3ds Max.")
+    parser.add_argument("--root", required=True, help="pasta onde procurar os arquivos")
+    parser.add_argument("--missing", required=True, help="lista de arquivos faltando (.txt, .json ou '-')")
+    parser.add_argument("--db", default=default_db_path(), help="índice de relink (SQLite)")
+    parser.add_argument("--out", help="grava o plano neste arquivo JSON (padrão: stdout)")
+    parser.add_argument("--no-subfolders", action="store_true")
+    parser.add_argument("--no-refresh", action="store_true", help="usa só o que já está indexado")
+    parser.add_argument("--ignore-ext", action="store_true")
+    parser.add_argument("--no-fuzzy", action="store_true")
+    parser.add_argument("--exhaustive", action="store_true", help="percorre a pasta toda para ranquear todos os nomes iguais")
+    parser.add_argument("--min-similarity", type=float, default=RelinkPlanner.MIN_SIMILARITY)
+    parser.add_argument("--bench", action="store_true", help="mostra tempos e taxas no stderr")
+    args = parser.parse_args(argv)
+
+    progress = None
+    if args.bench:
+        progress = lambda d, f, dr, fr: sys.stderr.write("\r{} pastas, {} arquivos ({:.0f} pastas/s, {:.0f} arquivos/s)".format(d, f, dr, fr))
+
+    index = RelinkIndex(args.db)
+    try:
+        planner = RelinkPlanner(read_missing(args.missing), ignore_ext=args.ignore_ext,
+                                fuzzy=not args.no_fuzzy, min_similarity=args.min_similarity, exhaustive=args.exhaustive)
+        plan = planner.run(index, args.root, not args.no_subfolders, refresh=not args.no_refresh, progress=progress)
+    finally:
+        index.close()
+
+    if args.out: plan.save(args.out)
+    else: json.dump(plan.to_dict(), sys.stdout, indent=2, ensure_ascii=False)
+    if args.bench:
+        sys.stderr.write("\n" + json.dumps(plan.stats) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
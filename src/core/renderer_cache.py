@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+import threading
+
+SCHEMA_VERSION = 1
+
+
+class RendererCache(object):
+    """Renderer detectado de cada .max (guess_renderer), guardado por caminho + tamanho + mtime
+    (do os.stat do arquivo, não do índice da biblioteca).
+
+    Detectar lê o arquivo, muitas vezes pela rede; com o cache, um asset já visto custa
+    só um stat, e um arquivo alterado simplesmente não bate a chave e é detectado de novo.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        try: self.conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.Error: pass
+        with self._lock:
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                self.conn.execute("DROP TABLE IF EXISTS renderers")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS renderers ("
+                " path TEXT PRIMARY KEY,"
+                " size INTEGER,"
+                " mtime REAL,"
+                " renderer TEXT"
+                ")")
+            self.conn.execute("PRAGMA user_version = {}".format(SCHEMA_VERSION))
+            self.conn.commit()
+
+    def close(self):
+        try: self.conn.close()
+        except Exception: pass
+
+    def get(self, path, size, mtime):
+        with self._lock:
+            row = self.conn.execute("SELECT size, mtime, renderer FROM renderers WHERE path = ?", (path,)).fetchone()
+        if row is None or row[0] != size or row[1] != mtime: return None
+        return row[2]
+
+    def put(self, path, size, mtime, renderer):
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO renderers (path, size, mtime, renderer) VALUES (?, ?, ?, ?)", (path, size, mtime, renderer))
+            self.conn.commit()
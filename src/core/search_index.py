@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import bisect
+
+from src.core.library_index import LibraryIndex
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def tokenize(text):
+    """Quebra um nome/tag em tokens minúsculos: palavras, partes camelCase e o texto inteiro."""
+    text = str(text or "").strip()
+    if not text: return set()
+    tokens = set(_WORD_RE.findall(text.lower()))
+    for word in _WORD_RE.findall(text):
+        tokens.update(p.lower() for p in _CAMEL_RE.findall(word))
+    tokens.add(text.lower())
+    return tokens
+
+
+class SearchIndex(object):
+    """Índice invertido (token -> assets) de nomes e tags da biblioteca inteira.
+
+    É imutável depois de construído, então pode ser montado num worker e entregue
+    pronto para a thread da UI. Cada termo da busca casa por prefixo com qualquer
+    token; termos múltiplos são combinados com AND.
+    """
+
+    def __init__(self, root, entries):
+        self.root = root
+        self.entries = entries
+        postings = {}
+        for idx, entry in enumerate(entries):
+            tokens = tokenize(entry['name'])
+            for tag in entry['tags']: tokens |= tokenize(tag)
+            for tok in tokens: postings.setdefault(tok, []).append(idx)
+        self._keys = sorted(postings)
+        self._postings = [postings[k] for k in self._keys]
+
+    @classmethod
+    def from_library(cls, library_index, root):
+        entries = []
+        for row in library_index.assets_under(root):
+            rel_parent = os.path.relpath(os.path.dirname(row['path']), root)
+            entries.append({
+                'path': row['path'],
+                'name': row['name'],
+                'category': "" if rel_parent == "." else rel_parent.replace("\\", "/"),
+                'formats': LibraryIndex.formats_of(row),
+                'preview': LibraryIndex.preview_of(row),
+                'tags': LibraryIndex.tags_of(row),
+            })
+        entries.sort(key=lambda e: (e['category'].lower(), e['name'].lower()))
+        return cls(root, entries)
+
+    def __len__(self): return len(self.entries)
+
+    def _match_prefix(self, term):
+        found = set()
+        pos = bisect.bisect_left(self._keys, term)
+        while pos < len(self._keys) and self._keys[pos].startswith(term):
+            found.update(self._postings[pos])
+            pos += 1
+        return found
+
+    def query_ids(self, terms, within=None):
+        """Índices das entradas que casam com todos os termos. `within` restringe a
+        busca a um resultado anterior (refinamento incremental enquanto se digita)."""
+        terms = [t.lower() for t in terms if t]
+        result = set(within) if within is not None else None
+        if not terms: return sorted(result) if result is not None else list(range(len(self.entries)))
+        # Termos mais longos primeiro: costumam ter menos resultados e encurtam as interseções
+        for term in sorted(set(terms), key=len, reverse=True):
+            ids = self._match_prefix(term)
+            result = ids if result is None else result & ids
+            if not result: return []
+        return sorted(result)
+
+    def query(self, terms, within=None):
+        """Retorna as entradas que casam com todos os termos, na ordem categoria/nome."""
+        return [self.entries[i] for i in self.query_ids(terms, within)]
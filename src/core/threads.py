@@ -1,135 +1,423 @@
 # -*- coding: utf-8 -*-
 import os
+import time
 import tempfile
-import hashlib
-import shutil
+import threading
 from src.utils.qt_compat import QtCore, QtGui
+from src.utils.logger import log_error, log_info
+from src.core.file_copy import FileCollector
+from src.core.library_index import LibraryIndex
+from src.core.max_metadata import guess_renderer
+from src.core.pack_archive import ScenePacker
+from src.core.relink_index import RelinkIndex
+from src.core.relink_planner import RelinkPlanner, RelinkPlan
+from src.core.search_index import SearchIndex
+from src.core.thumb_cache import ThumbnailCache
 
 class WorkerSignals(QtCore.QObject):
     finished = QtCore.Signal()
     result_ready = QtCore.Signal(str, object)
+    results_ready = QtCore.Signal(object)
     progress = QtCore.Signal(int, str)
     scan_result = QtCore.Signal(dict) 
+    index_updated = QtCore.Signal(str, object)
+    search_ready = QtCore.Signal(object)
+    error = QtCore.Signal(str)
+
+class ThumbnailJob(object):
+    """Uma carga de miniaturas dividida em blocos que rodam em paralelo no QThreadPool.
+
+    Os blocos compartilham sinais, cancelamento e contagem de progresso; `finished`
+    é emitido uma única vez, quando o último bloco termina. Resultados saem em lotes
+    (`results_ready`, lista de (caminho, QImage)) e o progresso é limitado a
+    PROGRESS_INTERVAL, para não inundar a fila de eventos da UI do Max.
+    """
+    CHUNK_SIZE = 24
+    BATCH_INTERVAL = 0.03
+    PROGRESS_INTERVAL = 0.15
+
+    def __init__(self, asset_data, thumb_cache, threadpool, thumb_size=None, caption=True):
+        self.asset_data = asset_data
+        self.thumb_cache = thumb_cache
+        self.threadpool = threadpool
+        self.thumb_size = thumb_size
+        self.caption = caption
+        self.signals = WorkerSignals()
+        self.is_running = True
+        self.total = len(asset_data)
+        self._done = 0
+        self._chunks_left = 0
+        self._last_progress = 0.0
+        self._lock = threading.Lock()
+
+    def start(self):
+        chunks = [self.asset_data[i:i + self.CHUNK_SIZE] for i in range(0, self.total, self.CHUNK_SIZE)]
+        self._chunks_left = len(chunks)
+        for chunk in chunks:
+            self.threadpool.start(ThumbnailLoader(chunk, self.thumb_cache, job=self, thumb_size=self.thumb_size, caption=self.caption))
+
+    def report_items(self, count):
+        now = time.time()
+        with self._lock:
+            self._done += count
+            done = self._done
+            if done < self.total and now - self._last_progress < self.PROGRESS_INTERVAL: return
+            self._last_progress = now
+        progress = int((float(done) / self.total) * 100)
+        self.signals.progress.emit(progress, "Carregando miniaturas... {}%".format(progress))
+
+    def chunk_finished(self):
+        with self._lock:
+            self._chunks_left -= 1
+            last = self._chunks_left == 0
+        if last:
+            self.thumb_cache.flush()
+            self.signals.finished.emit()
+
+    def stop(self): self.is_running = False
+
 
 class ThumbnailLoader(QtCore.QRunnable):
-    def __init__(self, asset_data, cache_dir=None):
+    """Gera as miniaturas de um bloco de assets. Usa só QImage (seguro fora da thread
+    da UI); a conversão para QPixmap/QIcon acontece na thread da UI.
+    `caption=False` gera só a imagem (ex.: materiais, cujo nome a lista já mostra)."""
+    THUMB_W, THUMB_H = 170, 160
+    PREVIEW_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".tga", ".tif")
+
+    def __init__(self, asset_data, thumb_cache=None, job=None, thumb_size=None, caption=True):
         super(ThumbnailLoader, self).__init__()
         self.asset_data = asset_data
-        self.signals = WorkerSignals()
+        self.thumb_w, self.thumb_h = thumb_size or (self.THUMB_W, self.THUMB_H)
+        self.caption = caption
+        self.job = job
+        self.signals = job.signals if job else WorkerSignals()
         self.is_running = True
-        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "NoobTools_Cache")
-        if not os.path.exists(self.cache_dir):
-            try: os.makedirs(self.cache_dir)
-            except Exception: self.cache_dir = tempfile.gettempdir()
+        self.thumb_cache = thumb_cache or ThumbnailCache(os.path.join(tempfile.gettempdir(), "NoobTools_Cache"))
 
-    def get_cache_path(self, asset_path, asset_name):
+    def running(self):
+        return self.is_running and (self.job is None or self.job.is_running)
+
+    def find_preview(self, folder_path, asset_name):
+        """Busca a imagem de preview no disco (usado só quando o índice não informou 'preview')."""
+        parent_dir = os.path.dirname(folder_path)
+        for ext in self.PREVIEW_EXTS:
+            attempt = os.path.join(parent_dir, asset_name + ext)
+            if os.path.exists(attempt): return attempt
         try:
-            if isinstance(asset_path, bytes): asset_path = asset_path.decode('utf-8', errors='replace')
-            if isinstance(asset_name, bytes): asset_name = asset_name.decode('utf-8', errors='replace')
-            cache_key = hashlib.md5((asset_path + asset_name).encode('utf-8', errors='replace')).hexdigest()
-            return os.path.join(self.cache_dir, "{}.png".format(cache_key))
-        except Exception:
-            safe_name = "".join(c for c in str(asset_name) if c.isalnum() or c in ('_', '-'))[:50]
-            return os.path.join(self.cache_dir, "{}.png".format(safe_name))
+            for entry in os.listdir(folder_path):
+                if entry.lower().endswith(self.PREVIEW_EXTS): return os.path.join(folder_path, entry)
+        except Exception: pass
+        return None
+
+    def compose(self, thumb_path, asset_name):
+        final_w, final_h = self.thumb_w, self.thumb_h
+        text_h = 30 if self.caption else 0
+        final_img = QtGui.QImage(final_w, final_h, QtGui.QImage.Format_RGB32)
+        final_img.fill(QtGui.QColor(30, 30, 30))
+
+        if thumb_path:
+            reader = QtGui.QImageReader(thumb_path)
+            # Decodifica já reduzido quando o formato suporta (JPEG), evitando ler a imagem inteira
+            src_size = reader.size()
+            if src_size.isValid():
+                reader.setScaledSize(src_size.scaled(final_w * 2, (final_h - text_h) * 2, QtCore.Qt.KeepAspectRatio))
+            image = reader.read()
+            if not image.isNull():
+                scaled = image.scaled(final_w, final_h - text_h, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+                x_pos = (final_w - scaled.width()) // 2
+                y_pos = 0 if self.caption else (final_h - scaled.height()) // 2
+                painter = QtGui.QPainter(final_img)
+                painter.drawImage(int(x_pos), int(y_pos), scaled)
+                painter.end()
+
+        if not self.caption: return final_img
+        painter = QtGui.QPainter(final_img)
+        painter.setPen(QtGui.QColor(220, 220, 220))
+        font = painter.font()
+        font.setPointSize(9)
+        painter.setFont(font)
+        display_name = asset_name[:25] + "..." if len(asset_name) > 25 else asset_name
+        text_rect = QtCore.QRect(0, final_h-30, final_w, 30)
+        painter.drawText(text_rect, QtCore.Qt.AlignCenter, display_name)
+        painter.end()
+        return final_img
+
+    def flush_results(self, batch):
+        if not batch: return
+        self.signals.results_ready.emit(list(batch))
+        if self.job: self.job.report_items(len(batch))
+        else:
+            self._done += len(batch)
+            progress = int((float(self._done) / len(self.asset_data)) * 100)
+            self.signals.progress.emit(progress, "Carregando miniaturas... {}%".format(progress))
+        del batch[:]
 
     def run(self):
-        total = len(self.asset_data)
-        for idx, data in enumerate(self.asset_data):
-            if not self.is_running: break
+        batch = []
+        last_flush = time.time()
+        self._done = 0
+        for data in self.asset_data:
+            if not self.running(): break
             try:
                 folder_path = str(data.get('path', ''))
                 asset_name = str(data.get('name', 'Unknown'))
-                if not folder_path or not os.path.exists(folder_path): continue
-                
-                cache_path = self.get_cache_path(folder_path, asset_name)
-                thumb_path = None
+                if not folder_path: continue
 
-                if cache_path and os.path.exists(cache_path):
+                thumb_path = data['preview'] if 'preview' in data else self.find_preview(folder_path, asset_name)
+                cache_key = None
+                if thumb_path:
                     try:
-                        if os.path.getmtime(cache_path) > os.path.getmtime(folder_path):
-                            thumb_path = cache_path
-                    except Exception: pass
-
-                if not thumb_path:
-                    parent_dir = os.path.dirname(folder_path)
-                    possible_exts = [".jpg", ".jpeg", ".png", ".bmp", ".tga", ".tif"]
-                    for ext in possible_exts:
-                        attempt = os.path.join(parent_dir, asset_name + ext)
-                        if os.path.exists(attempt): thumb_path = attempt; break
-                    
-                    if not thumb_path and os.path.isdir(folder_path):
-                        try:
-                            for entry in os.listdir(folder_path):
-                                if entry.lower().endswith(tuple(possible_exts)):
-                                    thumb_path = os.path.join(folder_path, entry); break
-                        except Exception: pass
-
-                    if thumb_path and cache_path:
-                        try: shutil.copy2(thumb_path, cache_path)
-                        except Exception: pass
-
-                final_w, final_h = 170, 160
-                final_pix = QtGui.QPixmap(final_w, final_h)
-                final_pix.fill(QtGui.QColor(30, 30, 30))
-
-                if thumb_path and os.path.exists(thumb_path):
-                    pixmap = QtGui.QPixmap(thumb_path)
-                    if not pixmap.isNull():
-                        scaled = pixmap.scaled(final_w, final_h-30, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
-                        x_pos = (final_w - scaled.width()) // 2
-                        painter = QtGui.QPainter(final_pix)
-                        painter.drawPixmap(int(x_pos), 0, scaled)
-                        painter.end()
-
-                painter = QtGui.QPainter(final_pix)
-                painter.setPen(QtGui.QColor(220, 220, 220))
-                font = painter.font()
-                font.setPointSize(9)
-                painter.setFont(font)
-                display_name = asset_name[:25] + "..." if len(asset_name) > 25 else asset_name
-                text_rect = QtCore.QRect(0, final_h-30, final_w, 30)
-                painter.drawText(text_rect, QtCore.Qt.AlignCenter, display_name)
-                painter.end()
+                        st = os.stat(thumb_path)
+                        variant = "{}x{}|{}".format(self.thumb_w, self.thumb_h, asset_name if self.caption else "")
+                        cache_key = ThumbnailCache.make_key(thumb_path, st.st_size, st.st_mtime, variant)
+                    except OSError: thumb_path = None
+
+                final_img = None
+                cached = self.thumb_cache.get(cache_key) if cache_key else None
+                if cached:
+                    final_img = QtGui.QImage(cached)
+                    if final_img.isNull():
+                        self.thumb_cache.discard(cache_key)
+                        final_img = None
 
-                self.signals.result_ready.emit(folder_path, QtGui.QIcon(final_pix))
-                progress = int((float(idx + 1) / total) * 100)
-                self.signals.progress.emit(progress, "Carregando miniaturas... {}%".format(progress))
+                if final_img is None:
+                    final_img = self.compose(thumb_path, asset_name)
+                    if cache_key: self.thumb_cache.store(cache_key, lambda tmp: final_img.save(tmp, "JPG", 90))
+
+                batch.append((folder_path, final_img))
+                if time.time() - last_flush >= ThumbnailJob.BATCH_INTERVAL:
+                    self.flush_results(batch)
+                    last_flush = time.time()
             except Exception: continue
-        self.signals.finished.emit()
+        self.flush_results(batch)
+        if self.job:
+            self.job.chunk_finished()
+        else:
+            self.thumb_cache.flush()
+            self.signals.finished.emit()
 
     def stop(self): self.is_running = False
 
 class RelinkScannerWorker(QtCore.QRunnable):
-    def __init__(self, search_path, include_subfolders):
+    """Roda o RelinkPlanner em background: casa os arquivos faltando enquanto a pasta
+    é lida (parando quando não falta mais nada). Emite parciais ({faltando: novo}) em
+    `results_ready` e o plano final (RelinkPlan.to_dict()) em `scan_result`."""
+    PARTIAL_INTERVAL = 0.3
+
+    def __init__(self, search_path, include_subfolders, db_path, missing_paths, ignore_ext=False, fuzzy=True):
         super(RelinkScannerWorker, self).__init__()
         self.search_path = search_path
         self.include_subfolders = include_subfolders
+        self.db_path = db_path
+        self.planner = RelinkPlanner(missing_paths, ignore_ext=ignore_ext, fuzzy=fuzzy)
         self.signals = WorkerSignals()
         self.is_running = True
+        self._last_partial = 0.0
+
+    def report_progress(self, dirs, files, dirs_rate, files_rate):
+        # Sem total conhecido: progress = -1, só a mensagem muda
+        self.signals.progress.emit(-1, "Lendo disco: {} pastas, {} arquivos ({:.0f} pastas/s, {:.0f} arquivos/s) | Encontrados {}/{}".format(
+            dirs, files, dirs_rate, files_rate, self.planner.found_count(), len(self.planner.missing_paths)))
+
+    def emit_partial(self, planner):
+        now = time.time()
+        if now - self._last_partial < self.PARTIAL_INTERVAL: return
+        self._last_partial = now
+        self.signals.results_ready.emit(planner.best_matches())
 
     def run(self):
-        file_dict = {}
+        index = None
+        plan = RelinkPlan(self.search_path)
         try:
-            for root, dirs, files in os.walk(self.search_path):
-                if not self.is_running: break
-                
-                if not self.include_subfolders and root != self.search_path: 
-                    continue
-                
-                dirs[:] = [d for d in dirs if os.access(os.path.join(root, d), os.R_OK)]
-                
-                for f in files:
-                    try:
-                        full_path = os.path.join(root, f)
-                        if os.access(full_path, os.R_OK):
-                            key = os.path.splitext(f.lower())[0]
-                            if key not in file_dict:
-                                file_dict[key] = []
-                            file_dict[key].append(full_path)
-                    except Exception: pass
-        except Exception: pass
+            index = RelinkIndex(self.db_path)
+            plan = self.planner.run(index, self.search_path, self.include_subfolders,
+                                    should_stop=lambda: not self.is_running,
+                                    progress=self.report_progress, on_partial=self.emit_partial)
+            log_info("Relink: {}/{} encontrados ({} por nome parecido), {} pastas relistadas, {} reaproveitadas em {:.1f}s".format(
+                len(plan), plan.stats.get('missing', 0), plan.count('fuzzy'),
+                plan.stats.get('dirs_listed', 0), plan.stats.get('dirs_reused', 0), plan.stats.get('seconds', 0)))
+        except Exception as e: log_error("Relink: " + str(e))
+        finally:
+            if index: index.close()
             
-        self.signals.scan_result.emit(file_dict)
+        self.signals.scan_result.emit(plan.to_dict())
+        self.signals.finished.emit()
+
+    def stop(self): self.is_running = False
+
+class MissingFilesWorker(QtCore.QRunnable):
+    """Verifica em paralelo quais caminhos de assets da cena não existem no disco.
+    A lista de caminhos vem do Max (thread da UI); aqui só há I/O."""
+    def __init__(self, paths, status_cache):
+        super(MissingFilesWorker, self).__init__()
+        self.paths = [p for p in paths if p]
+        self.status_cache = status_cache
+        self.signals = WorkerSignals()
+        self.is_running = True
+
+    def run(self):
+        try:
+            start = time.time()
+            status, cached = self.status_cache.check_many(self.paths, lambda: not self.is_running)
+            missing = sorted(p for p, exists in status.items() if not exists)
+            log_info("Scan: {} caminhos ({} do cache), {} faltando em {:.2f}s".format(
+                len(status), cached, len(missing), time.time() - start))
+            if self.is_running: self.signals.results_ready.emit(missing)
+        except Exception as e:
+            log_error("Scan: " + str(e))
+            # Lista vazia aqui seria lida como "cena limpa"
+            if self.is_running: self.signals.error.emit(str(e))
+        self.signals.finished.emit()
+
+    def stop(self): self.is_running = False
+
+class CollectFilesWorker(QtCore.QRunnable):
+    """Copia os arquivos da cena para a pasta do projeto (FileCollector) e devolve o
+    resultado com o mapeamento origem -> destino para o Max aplicar de uma vez."""
+    def __init__(self, paths, target_dir):
+        super(CollectFilesWorker, self).__init__()
+        self.paths = [p for p in paths if p]
+        self.target_dir = target_dir
+        self.signals = WorkerSignals()
+        self.is_running = True
+
+    def report_progress(self, done_bytes, total_bytes, done_files, total_files, rate):
+        percent = int(100.0 * done_bytes / total_bytes) if total_bytes else 100
+        self.signals.progress.emit(percent, "Copiando {}/{} arquivos | {:.0f}/{:.0f} MB ({:.1f} MB/s)".format(
+            done_files, total_files, done_bytes / 1048576.0, total_bytes / 1048576.0, rate / 1048576.0))
+
+    def run(self):
+        result = {'mapping': {}, 'copied': 0, 'skipped': 0, 'missing': [], 'errors': [], 'bytes': 0, 'cancelled': False}
+        try:
+            start = time.time()
+            result = FileCollector(self.target_dir).collect(self.paths, lambda: not self.is_running, self.report_progress)
+            log_info("Coletar: {} copiados, {} já idênticos, {} faltando, {} erros em {:.2f}s".format(
+                result['copied'], result['skipped'], len(result['missing']), len(result['errors']), time.time() - start))
+        except Exception as e: log_error("Coletar: " + str(e))
+        self.signals.results_ready.emit(result)
+        self.signals.finished.emit()
+
+    def stop(self): self.is_running = False
+
+class PackSceneWorker(QtCore.QRunnable):
+    """Pack & Go: grava a cópia da cena e os arquivos dela num único .zip (ScenePacker).
+    `cleanup` são arquivos temporários (a cópia do .max) apagados ao terminar."""
+    def __init__(self, archive_path, entries, cleanup=()):
+        super(PackSceneWorker, self).__init__()
+        self.archive_path = archive_path
+        self.entries = entries
+        self.cleanup = list(cleanup)
+        self.signals = WorkerSignals()
+        self.is_running = True
+
+    def report_progress(self, done_bytes, total_bytes, done_files, total_files, rate):
+        percent = int(100.0 * done_bytes / total_bytes) if total_bytes else 100
+        self.signals.progress.emit(percent, "Empacotando {}/{} arquivos | {:.0f}/{:.0f} MB ({:.1f} MB/s)".format(
+            done_files, total_files, done_bytes / 1048576.0, total_bytes / 1048576.0, rate / 1048576.0))
+
+    def run(self):
+        result = {'files': 0, 'bytes': 0, 'missing': [], 'errors': [], 'cancelled': False}
+        try:
+            start = time.time()
+            result = ScenePacker(self.archive_path).pack(self.entries, lambda: not self.is_running, self.report_progress)
+            log_info("Pack & Go: {} arquivos, {:.0f} MB em {:.2f}s -> {}".format(
+                result['files'], result['bytes'] / 1048576.0, time.time() - start, self.archive_path))
+        except Exception as e:
+            log_error("Pack & Go: " + str(e))
+            result['errors'].append((self.archive_path, str(e)))
+        finally:
+            for path in self.cleanup:
+                try: os.remove(path)
+                except OSError: pass
+        self.signals.results_ready.emit(result)
+        self.signals.finished.emit()
+
+    def stop(self): self.is_running = False
+
+class BackupWorker(QtCore.QRunnable):
+    """Hash, dedupe e rotação de um snapshot que o Max acabou de salvar (BackupManager.finalize)."""
+    def __init__(self, manager, scene_path, temp_path):
+        super(BackupWorker, self).__init__()
+        self.manager = manager
+        self.scene_path = scene_path
+        self.temp_path = temp_path
+
+    def run(self):
+        try:
+            start = time.time()
+            final, duplicate = self.manager.finalize(self.scene_path, self.temp_path)
+            log_info("Backup: {} {} ({:.2f}s)".format("igual a" if duplicate else "salvo em", final, time.time() - start))
+        except Exception as e:
+            log_error("Backup: " + str(e))
+            try: os.remove(self.temp_path)
+            except OSError: pass
+
+class RendererDetectWorker(QtCore.QRunnable):
+    """Renderer dos .max de uma pasta da biblioteca (guess_renderer, sem pymxs).
+    `items` são (pasta do asset, .max); o cache é consultado pelo os.stat atual do arquivo
+    e os resultados saem em lotes ({pasta: renderer}) por `scan_result`."""
+    BATCH_SECONDS = 0.25
+
+    def __init__(self, items, cache):
+        super(RendererDetectWorker, self).__init__()
+        self.items = list(items)
+        self.cache = cache
+        self.signals = WorkerSignals()
+        self.is_running = True
+
+    def run(self):
+        batch, last = {}, time.time()
+        for folder, main_file in self.items:
+            if not self.is_running: break
+            try:
+                st = os.stat(main_file)
+                renderer = self.cache.get(main_file, st.st_size, st.st_mtime)
+                if renderer is None:
+                    renderer = guess_renderer(main_file)
+                    self.cache.put(main_file, st.st_size, st.st_mtime, renderer)
+            except Exception as e:
+                log_error("Renderer: {} - {}".format(main_file, e))
+                continue
+            batch[folder] = renderer
+            if time.time() - last >= self.BATCH_SECONDS:
+                self.signals.scan_result.emit(batch)
+                batch, last = {}, time.time()
+        if batch and self.is_running: self.signals.scan_result.emit(batch)
+        self.signals.finished.emit()
+
+    def stop(self): self.is_running = False
+
+class LibraryIndexWorker(QtCore.QRunnable):
+    """Revalida o índice da biblioteca em background (só relista diretórios cujo mtime mudou),
+    relê os metadata.json alterados, monta o índice de busca da biblioteca inteira e
+    lê o manifesto de dependências dos .max novos ou alterados."""
+    def __init__(self, db_path, root):
+        super(LibraryIndexWorker, self).__init__()
+        self.db_path = db_path
+        self.root = root
+        self.signals = WorkerSignals()
+        self.is_running = True
+
+    def run(self):
+        changed = []
+        index = None
+        search_index = None
+        try:
+            index = LibraryIndex(self.db_path)
+            changed = index.refresh_tree(self.root, should_stop=lambda: not self.is_running)
+            if self.is_running: index.refresh_metadata(self.root, should_stop=lambda: not self.is_running)
+            if self.is_running: search_index = SearchIndex.from_library(index, self.root)
+            if changed and self.is_running: self.signals.index_updated.emit(self.root, changed)
+            if search_index is not None and self.is_running: self.signals.search_ready.emit(search_index)
+            # Manifestos de dependências por último: a grade e a busca não esperam por eles
+            if self.is_running:
+                start = time.time()
+                count = index.refresh_dependencies(self.root, should_stop=lambda: not self.is_running)
+                if count: log_info("Dependências lidas de {} arquivos .max em {:.2f}s".format(count, time.time() - start))
+        except Exception as e:
+            log_error("Falha ao atualizar o índice da biblioteca: " + str(e))
+        finally:
+            if index: index.close()
         self.signals.finished.emit()
 
     def stop(self): self.is_running = False
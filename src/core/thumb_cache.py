@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_MB = 256
+THUMB_EXT = ".jpg"
+
+
+class ThumbnailCache(object):
+    """Cache em disco das miniaturas já compostas, endereçado pelo conteúdo da origem.
+
+    A chave é derivada de caminho + tamanho + mtime da imagem de origem (mais a
+    variante, ex. dimensões), então uma origem alterada gera outra chave e a
+    antiga simplesmente envelhece até ser despejada. O total em bytes e a ordem
+    LRU ficam em memória e são persistidos em `index.json`; nada aqui precisa
+    percorrer o diretório, exceto a primeira abertura sem índice.
+    """
+    INDEX_FILE = "index.json"
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # nome do arquivo -> tamanho, do menos para o mais recente
+        self._total = 0
+        self._dirty = False
+        if not os.path.exists(self.cache_dir):
+            try: os.makedirs(self.cache_dir)
+            except Exception: pass
+        self._load()
+
+    @staticmethod
+    def make_key(source_path, size, mtime, variant=""):
+        raw = u"{}|{}|{}|{}".format(source_path, size, mtime, variant)
+        return hashlib.sha1(raw.encode('utf-8', errors='replace')).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, key + THUMB_EXT)
+
+    # --------------------------------------------------------------------------
+    # Bookkeeping
+    # --------------------------------------------------------------------------
+    def _load(self):
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for name, size in data.get('entries', []):
+                self._entries[name] = int(size)
+        except Exception:
+            # Sem índice (primeira execução ou cache antigo): adota o que houver na pasta, mais antigos primeiro
+            found = []
+            try:
+                with os.scandir(self.cache_dir) as it:
+                    for entry in it:
+                        if entry.is_file() and entry.name != self.INDEX_FILE:
+                            st = entry.stat()
+                            found.append((st.st_mtime, entry.name, st.st_size))
+            except OSError: pass
+            for _, name, size in sorted(found):
+                self._entries[name] = size
+            self._dirty = True
+        self._total = sum(self._entries.values())
+        self._evict()
+
+    def flush(self):
+        """Grava o índice LRU em disco (só se mudou)."""
+        with self._lock:
+            if not self._dirty: return
+            data = {'saved': time.time(), 'entries': list(self._entries.items())}
+            self._dirty = False
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        tmp = index_path + ".tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp, index_path)
+        except Exception: pass
+
+    def total_bytes(self):
+        with self._lock: return self._total
+
+    def count(self):
+        with self._lock: return len(self._entries)
+
+    def set_max_bytes(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            names = list(self._entries)
+            self._entries.clear()
+            self._total = 0
+            self._dirty = True
+        for name in names:
+            try: os.remove(os.path.join(self.cache_dir, name))
+            except Exception: pass
+        self.flush()
+
+    # --------------------------------------------------------------------------
+    # Leitura / escrita
+    # --------------------------------------------------------------------------
+    def get(self, key):
+        """Caminho da miniatura em cache (marcando como usada recentemente) ou None."""
+        name = key + THUMB_EXT
+        with self._lock:
+            if name not in self._entries: return None
+            self._entries.move_to_end(name)
+            self._dirty = True
+        return os.path.join(self.cache_dir, name)
+
+    def store(self, key, writer):
+        """Grava uma miniatura nova. `writer(tmp_path)` escreve o arquivo e retorna True/False."""
+        name = key + THUMB_EXT
+        final_path = os.path.join(self.cache_dir, name)
+        tmp = "{}.{}.tmp{}".format(final_path[:-len(THUMB_EXT)], threading.get_ident(), THUMB_EXT)
+        try:
+            if not writer(tmp): raise IOError("writer failed")
+            size = os.path.getsize(tmp)
+            os.replace(tmp, final_path)
+        except Exception:
+            try: os.remove(tmp)
+            except Exception: pass
+            return None
+        with self._lock:
+            self._total += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+            self._dirty = True
+            self._evict()
+        return final_path
+
+    def discard(self, key):
+        name = key + THUMB_EXT
+        with self._lock:
+            size = self._entries.pop(name, None)
+            if size is None: return
+            self._total -= size
+            self._dirty = True
+        try: os.remove(os.path.join(self.cache_dir, name))
+        except Exception: pass
+
+    def _evict(self):
+        # Chamado com o lock adquirido
+        while self._total > self.max_bytes and self._entries:
+            name, size = self._entries.popitem(last=False)
+            self._total -= size
+            self._dirty = True
+            try: os.remove(os.path.join(self.cache_dir, name))
+            except Exception: pass
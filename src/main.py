@@ -24,9 +24,26 @@ def reload_modules():
     to_reload = [
         "src.utils.logger",
         "src.utils.qt_compat",
+        "src.core.fuzzy_match",
+        "src.core.max_metadata",
+        "src.core.library_index",
+        "src.core.search_index",
+        "src.core.crawler",
+        "src.core.relink_index",
+        "src.core.relink_planner",
+        "src.core.file_status",
+        "src.core.file_copy",
+        "src.core.pack_archive",
+        "src.core.backup_manager",
+        "src.core.renderer_cache",
+        "src.core.bitmap_paths",
+        "src.core.thumb_cache",
         "src.core.threads",
         "src.ui.style",
         "src.ui.widgets",
+        "src.ui.search",
+        "src.ui.thumbnail_service",
+        "src.ui.asset_model",
         "src.ui.main_window"
     ]
     for mod_name in to_reload:
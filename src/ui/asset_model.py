@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+from functools import partial
+
+from src.utils.qt_compat import QtCore
+
+
+class AssetListModel(QtCore.QAbstractListModel):
+    """Modelo da grade de assets.
+
+    Guarda todas as entradas da pasta/busca e a lista das que estão visíveis (filtro).
+    Os ícones vêm do ThumbnailService (compartilhado entre as abas); linhas sem
+    ícone mostram o placeholder e avisam (`thumbnails_wanted`) quando são pintadas.
+    """
+    thumbnails_wanted = QtCore.Signal()
+
+    def __init__(self, placeholder, thumb_service, parent=None):
+        super(AssetListModel, self).__init__(parent)
+        self.placeholder = placeholder
+        self.thumb_service = thumb_service
+        self.entries = []
+        self.show_category = False
+        self._shown = []
+        self._index_of = {}     # caminho -> índice em self.entries
+        self._row_of = {}       # índice em self.entries -> linha visível
+        self._want_emitted = False
+        self.renderers = {}     # caminho -> renderer detectado (tooltip)
+        self.thumb_service.icons_updated.connect(self.icons_updated)
+
+    # --------------------------------------------------------------------------
+    # Conteúdo
+    # --------------------------------------------------------------------------
+    def set_entries(self, entries, show_category=False):
+        self.beginResetModel()
+        self.entries = list(entries)
+        self.show_category = show_category
+        self._index_of = dict((e['path'], i) for i, e in enumerate(self.entries))
+        self._shown = list(range(len(self.entries)))
+        self._row_of = dict((i, i) for i in self._shown)
+        self.endResetModel()
+
+    def set_visible_rows(self, rows):
+        """Filtra a grade; `rows` são índices de `entries` (None = todos)."""
+        shown = sorted(rows) if rows is not None else list(range(len(self.entries)))
+        if shown == self._shown: return
+        self.beginResetModel()
+        self._shown = shown
+        self._row_of = dict((i, r) for r, i in enumerate(shown))
+        self.endResetModel()
+
+    def source_count(self): return len(self.entries)
+
+    def entry_index(self, path): return self._index_of.get(path)
+
+    def entry_at(self, row):
+        return self.entries[self._shown[row]] if 0 <= row < len(self._shown) else None
+
+    def path_at(self, row):
+        entry = self.entry_at(row)
+        return entry['path'] if entry else None
+
+    # --------------------------------------------------------------------------
+    # Ícones
+    # --------------------------------------------------------------------------
+    def has_icon(self, path): return self.thumb_service.has(path)
+
+    def icons_updated(self, paths):
+        """Repinta as linhas de um lote de ícones novos com um único dataChanged (O(1) por item)."""
+        first = last = None
+        for path in paths:
+            row = self._row_of.get(self._index_of.get(path))
+            if row is None: continue
+            first = row if first is None else min(first, row)
+            last = row if last is None else max(last, row)
+        if first is not None:
+            self.dataChanged.emit(self.index(first), self.index(last), [QtCore.Qt.DecorationRole])
+
+    def clear_wanted(self): self._want_emitted = False
+
+    def set_renderers(self, renderers):
+        """Renderers detectados em background ({caminho: nome}); só repinta o tooltip."""
+        self.renderers.update(renderers)
+        rows = [self._row_of.get(self._index_of.get(path)) for path in renderers]
+        rows = [r for r in rows if r is not None]
+        if rows: self.dataChanged.emit(self.index(min(rows)), self.index(max(rows)), [QtCore.Qt.ToolTipRole])
+
+    # --------------------------------------------------------------------------
+    # QAbstractListModel
+    # --------------------------------------------------------------------------
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._shown)
+
+    def flags(self, index):
+        if not index.isValid(): return QtCore.Qt.NoItemFlags
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsDragEnabled
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        entry = self.entry_at(index.row()) if index.isValid() else None
+        if entry is None: return None
+        if role == QtCore.Qt.DisplayRole:
+            if self.show_category and entry['category']: return "{}\n{}".format(entry['name'], entry['category'])
+            return entry['name']
+        if role == QtCore.Qt.DecorationRole:
+            icon = self.thumb_service.icon(entry['path'])
+            if icon is not None: return icon
+            if not self._want_emitted:
+                self._want_emitted = True
+                self.thumbnails_wanted.emit()
+            return self.placeholder
+        if role == QtCore.Qt.UserRole: return entry['path']
+        if role == QtCore.Qt.ToolTipRole:
+            renderer = self.renderers.get(entry['path'])
+            if self.show_category: return "{}\nRenderer: {}".format(entry['path'], renderer) if renderer else entry['path']
+            return "Renderer: {}".format(renderer) if renderer else None
+        return None
+
+
+class ThumbnailScheduler(QtCore.QObject):
+    """Pede miniaturas só para as linhas na tela (mais uma margem à frente).
+
+    A cada rolagem/redimensionamento o job atual é cancelado se não cobrir mais a
+    área visível e um novo é disparado com as linhas visíveis primeiro. Os lotes
+    que chegam dos workers são acumulados e aplicados ao modelo a cada DELIVERY_MS.
+    """
+    DELAY_MS = 40
+    DELIVERY_MS = 30
+
+    def __init__(self, view, model, thumb_service, on_progress=None, on_finished=None):
+        super(ThumbnailScheduler, self).__init__(view)
+        self.view = view
+        self.model = model
+        self.thumb_service = thumb_service
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.job = None
+        self.job_paths = set()
+        self.delivered = set()
+        self.failed = set()   # itens que um job completo não conseguiu gerar; não repete em loop
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.DELAY_MS)
+        self.timer.timeout.connect(self.dispatch)
+        self.incoming = []
+        self.delivery_timer = QtCore.QTimer(self)
+        self.delivery_timer.setSingleShot(True)
+        self.delivery_timer.setInterval(self.DELIVERY_MS)
+        self.delivery_timer.timeout.connect(self.deliver)
+        self.view.verticalScrollBar().valueChanged.connect(self.schedule)
+        self.model.modelReset.connect(self.on_model_reset)
+        self.model.thumbnails_wanted.connect(self.schedule)
+
+    def on_model_reset(self):
+        self.failed = set()
+        self.schedule()
+
+    def schedule(self, *args):
+        if not self.timer.isActive(): self.timer.start()
+
+    def stop(self):
+        if self.job: self.job.stop()
+        self.job = None
+        self.job_paths = set()
+
+    def visible_rows(self):
+        """Linhas na viewport mais meia tela acima e uma tela abaixo."""
+        count = self.model.rowCount()
+        if count == 0: return []
+        first, last = self._edge_row(True), self._edge_row(False)
+        if first < 0: first = 0
+        if last < first: last = min(count - 1, first + 50)
+        span = last - first + 1
+        rows = list(range(first, last + 1))
+        rows += list(range(last + 1, min(count, last + 1 + span)))
+        rows += list(range(first - 1, max(-1, first - 1 - span // 2), -1))
+        return rows
+
+    def _edge_row(self, from_top):
+        vp = self.view.viewport().rect()
+        ys = range(vp.top() + 1, vp.bottom(), 8) if from_top else range(vp.bottom() - 1, vp.top(), -8)
+        for y in ys:
+            rows = [self.view.indexAt(QtCore.QPoint(x, y)).row() for x in range(vp.left() + 1, vp.right(), 16)]
+            rows = [r for r in rows if r >= 0]
+            if rows: return min(rows) if from_top else max(rows)
+        return -1
+
+    def dispatch(self):
+        self.model.clear_wanted()
+        wanted = []
+        for row in self.visible_rows():
+            entry = self.model.entry_at(row)
+            if entry and entry['path'] not in self.failed and not self.model.has_icon(entry['path']): wanted.append(entry)
+        if not wanted: return
+        paths = set(e['path'] for e in wanted)
+        if self.job and self.job.is_running and paths <= self.job_paths: return
+
+        self.stop()
+        job = self.thumb_service.create_job([{'path': e['path'], 'name': e['name'], 'preview': e['preview']} for e in wanted])
+        job.signals.results_ready.connect(self.on_results)
+        if self.on_progress: job.signals.progress.connect(self.on_progress)
+        job.signals.finished.connect(partial(self.on_job_finished, job))
+        self.job, self.job_paths, self.delivered = job, paths, set()
+        job.start()
+
+    def on_results(self, results):
+        self.incoming.extend(results)
+        if not self.delivery_timer.isActive(): self.delivery_timer.start()
+
+    def deliver(self):
+        batch, self.incoming = self.incoming, []
+        if not batch: return
+        self.delivered.update(self.thumb_service.put_images(batch))
+
+    def on_job_finished(self, job):
+        self.deliver()
+        if job is self.job:
+            if job.is_running: self.failed |= self.job_paths - self.delivered
+            self.job = None
+            self.job_paths = set()
+        if self.on_finished: self.on_finished()
+        # Ícones podem ter sido despejados da memória enquanto o job rodava
+        self.schedule()
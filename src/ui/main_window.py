@@ -1,8 +1,8 @@
 # -*- coding: utf-8 -*-
 import os
 import sys
-import glob
 import json
+import time
 from datetime import datetime
 from functools import partial
 import tempfile
@@ -10,8 +10,20 @@ import pymxs
 
 from src.utils.qt_compat import QtWidgets, QtCore, QtGui, qt_exec, IS_PYSIDE6
 from src.utils.logger import log_error, log_info, log_warning
-from src.core.threads import WorkerSignals, ThumbnailLoader, RelinkScannerWorker
+from src.core.threads import WorkerSignals, RelinkScannerWorker, LibraryIndexWorker, MissingFilesWorker, CollectFilesWorker, PackSceneWorker, BackupWorker, RendererDetectWorker
+from src.core.library_index import LibraryIndex
+from src.core.max_metadata import resolve_dependencies
+from src.core.thumb_cache import ThumbnailCache, DEFAULT_MAX_MB
+from src.core.relink_planner import RelinkPlan
+from src.core.file_status import FileStatusCache
+from src.core.pack_archive import archive_names, max_relative
+from src.core.renderer_cache import RendererCache
+from src.core.bitmap_paths import BitmapPathRegistry, MaxBitmapPaths, DEFAULT_MAX_PATHS
+from src.core.backup_manager import BackupManager, DEFAULT_KEEP, DEFAULT_MAX_MB as DEFAULT_BACKUP_MB, DEFAULT_WINDOW
 from src.ui.widgets import DroppableAssetList
+from src.ui.search import SearchController
+from src.ui.asset_model import AssetListModel, ThumbnailScheduler
+from src.ui.thumbnail_service import ThumbnailService, DEFAULT_MEMORY_MB
 from src.ui.style import MODERN_THEME_STYLESHEET
 
 def get_max_main_window():
@@ -27,28 +39,9 @@ def get_max_main_window():
         return app.activeWindow()
     except Exception: return None
 
-def add_bitmap_path(path):
-    rt = pymxs.runtime
-    try:
-        current = list(rt.bitmapPaths.getPaths())
-        if path not in current:
-            rt.bitmapPaths.add(path)
-            return True
-    except AttributeError:
-        try:
-            rt.pathConfig.appendPathToBitmaps(path)
-            return True
-        except Exception: pass
-    return False
-
-def setup_bitmap_paths_for_asset(asset_folder):
-    added = []
-    if add_bitmap_path(asset_folder): added.append(asset_folder)
-    for sub in ['maps', 'textures', 'tex']:
-        subpath = os.path.join(asset_folder, sub)
-        if os.path.isdir(subpath) and add_bitmap_path(subpath):
-            added.append(subpath)
-    return added
+def asset_bitmap_dirs(asset_folder):
+    """Pasta do asset + subpastas de textura que existem."""
+    return [asset_folder] + [p for p in (os.path.join(asset_folder, sub) for sub in ['maps', 'textures', 'tex']) if os.path.isdir(p)]
 
 def refresh_asset_tracker():
     try: pymxs.runtime.ATSOps.Refresh()
@@ -58,6 +51,9 @@ def refresh_asset_tracker():
 # 6. JANELA PRINCIPAL
 # ==============================================================================
 class NoobToolsWindow(QtWidgets.QWidget):
+    MAT_PREVIEW_BATCH = 8
+    MAT_PREVIEW_EXTS = (".jpg", ".png", ".jpeg")   # prioridade do preview de um .mat
+
     def __init__(self, parent=None):
         super(NoobToolsWindow, self).__init__(parent, QtCore.Qt.Window | QtCore.Qt.Tool)
 
@@ -67,9 +63,20 @@ class NoobToolsWindow(QtWidgets.QWidget):
         self.setStyleSheet(MODERN_THEME_STYLESHEET) 
 
         self.threadpool = QtCore.QThreadPool()
-        self.threadpool.setMaxThreadCount(min(max(os.cpu_count() or 4, 4), 8))
-        self.current_worker = None
+        self.threadpool.setMaxThreadCount(min(max(os.cpu_count() or 4, 4), 16))
         self.scanner_worker = None
+        self.missing_worker = None
+        self.collect_worker = None
+        self.pack_worker = None
+        self.pack_check_worker = None
+        self.pack_missing = 0
+        self.file_status = FileStatusCache()
+        self.index_worker = None
+        self.current_asset_folder = ""
+        self.pending_subcategory = ""
+        self.search_index = None
+        self.search_active = False
+        self.search_ids = []
         
         self.favorites = []
         self.relink_path = ""
@@ -84,19 +91,33 @@ class NoobToolsWindow(QtWidgets.QWidget):
             
         self.settings_file = os.path.join(self.app_data_dir, "settings.json")
         self.cache_dir = os.path.join(tempfile.gettempdir(), "NoobTools_Cache")
+        self.library_index = LibraryIndex(os.path.join(self.app_data_dir, "library_index.db"))
+        self.relink_index_path = os.path.join(self.app_data_dir, "relink_index.db")
+        self.renderer_cache = RendererCache(os.path.join(self.app_data_dir, "renderer_cache.db"))
+        self.renderer_worker = None
+        self.info_folder = None
         
         # Estado inicial das configurações
         self.settings = {
             'lib_path': "",
             'mat_lib_path': "",
             'enable_autobackup': True,
+            'thumb_cache_mb': DEFAULT_MAX_MB,
+            'thumb_memory_mb': DEFAULT_MEMORY_MB,
+            'backup_keep': DEFAULT_KEEP,
+            'backup_max_mb': DEFAULT_BACKUP_MB,
+            'backup_window_s': DEFAULT_WINDOW,
+            'bitmap_paths_max': DEFAULT_MAX_PATHS,
+            'bitmap_paths_session': False,
+            'bitmap_paths_owned': [],
             'favs': [],
             'favs_fix': []
         }
 
-        if not os.path.exists(self.cache_dir):
-            try: os.makedirs(self.cache_dir)
-            except Exception: pass
+        self.thumb_cache = ThumbnailCache(self.cache_dir)
+        self.thumb_service = ThumbnailService(self.thumb_cache, self.threadpool, parent=self)
+        self.backup_manager = BackupManager()
+        self.bitmap_paths = BitmapPathRegistry(MaxBitmapPaths(pymxs.runtime))
 
         self.setup_ui()
         self.setup_shortcuts()
@@ -213,17 +234,27 @@ class NoobToolsWindow(QtWidgets.QWidget):
         filter_group.setLayout(layout_filtros)
         layout.addWidget(filter_group)
 
-        # Asset List
+        # Asset List (model/view: só as linhas visíveis pedem miniatura)
+        pix = QtGui.QPixmap(170, 160); pix.fill(QtGui.QColor(36, 36, 38))
+        painter = QtGui.QPainter(pix); painter.setPen(QtGui.QColor(100,100,100))
+        painter.drawText(pix.rect(), QtCore.Qt.AlignCenter, "Loading...")
+        painter.end()
+        self.asset_model = AssetListModel(QtGui.QIcon(pix), self.thumb_service, self)
         self.asset_list = DroppableAssetList()
-        self.asset_list.setViewMode(QtWidgets.QListWidget.IconMode)
+        self.asset_list.setModel(self.asset_model)
+        self.asset_list.setViewMode(QtWidgets.QListView.IconMode)
         self.asset_list.setIconSize(QtCore.QSize(170, 160))
-        self.asset_list.setResizeMode(QtWidgets.QListWidget.Adjust)
+        self.asset_list.setResizeMode(QtWidgets.QListView.Adjust)
+        self.asset_list.setMovement(QtWidgets.QListView.Static)
+        self.asset_list.setUniformItemSizes(True)
         self.asset_list.setSpacing(10)
         self.asset_list.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
         self.asset_list.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
         self.asset_list.customContextMenuRequested.connect(self.open_asset_context_menu)
         self.asset_list.files_dropped.connect(self.handle_dropped_files)
         layout.addWidget(self.asset_list)
+        self.thumb_scheduler = ThumbnailScheduler(self.asset_list, self.asset_model, self.thumb_service,
+                                                  on_progress=self.update_thumbnail_progress, on_finished=self.update_cache_size_label)
 
         # Info
         info_group = QtWidgets.QGroupBox("ASSET INFO")
@@ -281,10 +312,11 @@ class NoobToolsWindow(QtWidgets.QWidget):
         self.btn_refresh.clicked.connect(self.refresh_ui)
         self.combo_category.currentIndexChanged.connect(self.on_category_changed)
         self.combo_subcategory.currentIndexChanged.connect(self.on_subcategory_changed)
-        self.input_search.textChanged.connect(self.filter_assets)
-        self.asset_list.itemDoubleClicked.connect(self.run_import_logic)
-        self.asset_list.itemClicked.connect(self.update_asset_info)
-        self.asset_list.itemSelectionChanged.connect(self.on_selection_changed)
+        self.asset_search = SearchController(self.input_search, self.asset_list)
+        self.asset_search.searched.connect(self.filter_assets)
+        self.asset_list.doubleClicked.connect(self.run_import_logic)
+        self.asset_list.clicked.connect(self.update_asset_info)
+        self.asset_list.selectionModel().selectionChanged.connect(self.on_selection_changed)
         
         self.btn_open.clicked.connect(lambda: pymxs.runtime.execute("max group open"))
         self.btn_close.clicked.connect(lambda: pymxs.runtime.execute("max group close"))
@@ -352,7 +384,13 @@ class NoobToolsWindow(QtWidgets.QWidget):
         layout_exec_opcoes = QtWidgets.QHBoxLayout()
         self.chk_ignore_ext = QtWidgets.QCheckBox("Ignorar Extensao"); self.chk_ignore_ext.setChecked(True)
         self.chk_subfolders = QtWidgets.QCheckBox("Incluir Subpastas"); self.chk_subfolders.setChecked(True)
+        self.chk_direct_props = QtWidgets.QCheckBox("Direto nos Mapas")
+        self.chk_direct_props.setToolTip("Troca o caminho direto na propriedade dos mapas em vez de usar o Asset Tracking.")
+        self.chk_fuzzy = QtWidgets.QCheckBox("Nomes Parecidos"); self.chk_fuzzy.setChecked(True)
+        self.chk_fuzzy.setToolTip("Sem nome idêntico, aceita o nome mais parecido (ex.: wood_diff -> wood_diffuse).")
         layout_exec_opcoes.addWidget(self.chk_ignore_ext); layout_exec_opcoes.addWidget(self.chk_subfolders)
+        layout_exec_opcoes_2 = QtWidgets.QHBoxLayout()
+        layout_exec_opcoes_2.addWidget(self.chk_fuzzy); layout_exec_opcoes_2.addWidget(self.chk_direct_props)
         
         self.lbl_info_files = QtWidgets.QLabel("Aguardando...")
         self.pb_relink = QtWidgets.QProgressBar()
@@ -361,9 +399,14 @@ class NoobToolsWindow(QtWidgets.QWidget):
         self.btn_run_relink = QtWidgets.QPushButton("BUSCAR E RELINKAR")
         self.btn_run_relink.setObjectName("btnRelink"); self.btn_run_relink.setEnabled(False)
         self.btn_collect = QtWidgets.QPushButton("COLETAR (Copy to Project)")
+        self.btn_pack = QtWidgets.QPushButton("PACK & GO (.zip)")
+        self.btn_pack.setToolTip("Grava a cena e todas as texturas num único .zip, com caminhos relativos ao pacote.")
         
-        layout_exec.addLayout(layout_exec_opcoes); layout_exec.addWidget(self.lbl_info_files); layout_exec.addWidget(self.pb_relink)
-        layout_exec.addWidget(self.btn_run_relink); layout_exec.addWidget(self.btn_collect)
+        layout_exec.addLayout(layout_exec_opcoes); layout_exec.addLayout(layout_exec_opcoes_2); layout_exec.addWidget(self.lbl_info_files); layout_exec.addWidget(self.pb_relink)
+        layout_exec.addWidget(self.btn_run_relink)
+        layout_collect = QtWidgets.QHBoxLayout()
+        layout_collect.addWidget(self.btn_collect); layout_collect.addWidget(self.btn_pack)
+        layout_exec.addLayout(layout_collect)
         exec_group.setLayout(layout_exec)
         layout.addWidget(exec_group)
 
@@ -395,6 +438,7 @@ class NoobToolsWindow(QtWidgets.QWidget):
         self.btn_unc.clicked.connect(self.convert_to_unc)
         self.btn_run_relink.clicked.connect(self.start_relink_scanner) 
         self.btn_collect.clicked.connect(self.collect_files)
+        self.btn_pack.clicked.connect(self.pack_scene)
 
     # --- TAB: MATERIAL MANAGER ---
     def setup_material_manager_tab(self):
@@ -443,6 +487,11 @@ class NoobToolsWindow(QtWidgets.QWidget):
         self.mat_list.setSpacing(10)
         self.mat_list.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
         layout.addWidget(self.mat_list)
+        pix = QtGui.QPixmap(130, 110); pix.fill(QtGui.QColor(36, 36, 38))
+        self.mat_placeholder = QtGui.QIcon(pix)
+        self.mat_items = {}
+        self.mat_thumb_job = None
+        self.thumb_service.icons_updated.connect(self.on_material_icons_updated)
 
         # 4. Info & Action
         info_group = QtWidgets.QGroupBox("MATERIAL INFO")
@@ -463,7 +512,8 @@ class NoobToolsWindow(QtWidgets.QWidget):
         self.btn_generate_previews.clicked.connect(self.generate_mat_previews)
         self.combo_category_mat.currentIndexChanged.connect(self.on_category_changed_mat)
         self.combo_subcategory_mat.currentIndexChanged.connect(self.on_subcategory_changed_mat)
-        self.input_search_mat.textChanged.connect(self.filter_materials)
+        self.mat_search = SearchController(self.input_search_mat, self.mat_list)
+        self.mat_search.searched.connect(self.filter_materials)
         self.mat_list.itemClicked.connect(self.update_material_info_mat)
         self.mat_list.itemDoubleClicked.connect(self.on_material_double_clicked)
         self.mat_list.customContextMenuRequested.connect(self.open_material_context_menu)
@@ -501,7 +551,7 @@ class NoobToolsWindow(QtWidgets.QWidget):
         
         self.combo_category_mat.blockSignals(False)
         if self.combo_category_mat.count() > 0: self.on_category_changed_mat()
-        else: self.mat_list.clear()
+        else: self.clear_material_grid()
 
     def on_category_changed_mat(self):
         cat = self.combo_category_mat.currentText()
@@ -523,7 +573,7 @@ class NoobToolsWindow(QtWidgets.QWidget):
             self.combo_subcategory_mat.setVisible(True)
             self.combo_subcategory_mat.blockSignals(False)
             if subfolders: self.on_subcategory_changed_mat()
-            else: self.mat_list.clear()
+            else: self.clear_material_grid()
 
     def on_subcategory_changed_mat(self):
         cat = self.combo_category_mat.currentText()
@@ -532,19 +582,66 @@ class NoobToolsWindow(QtWidgets.QWidget):
         if not cat or not sub or not root: return
         self.populate_material_grid(os.path.join(root, cat, sub))
 
-    def populate_material_grid(self, folder):
+    def clear_material_grid(self):
+        if self.mat_thumb_job: self.mat_thumb_job.stop()
+        self.mat_thumb_job = None
+        self.mat_items = {}
         self.mat_list.clear()
+
+    def populate_material_grid(self, folder):
+        self.clear_material_grid()
         if not os.path.isdir(folder): return
-        
-        for f in os.listdir(folder):
-            if f.lower().endswith(".mat"):
+        try: files = os.listdir(folder)
+        except Exception: return
+
+        # Uma listagem só: os previews ao lado do .mat saem do mesmo os.listdir; com mais
+        # de um para o mesmo nome vale a ordem de MAT_PREVIEW_EXTS (o .jpg que geramos primeiro)
+        ext_rank = lambda f: self.MAT_PREVIEW_EXTS.index(os.path.splitext(f)[1].lower())
+        images = {}
+        for f in files:
+            if os.path.splitext(f)[1].lower() not in self.MAT_PREVIEW_EXTS: continue
+            key = os.path.splitext(f)[0].lower()
+            images[key] = min(images.get(key, f), f, key=ext_rank)
+        file_icon = self.style().standardIcon(QtWidgets.QStyle.SP_FileIcon)
+        pending = []
+        self.mat_list.setUpdatesEnabled(False)
+        try:
+            for f in files:
+                if not f.lower().endswith(".mat"): continue
                 full_p = os.path.join(folder, f)
+                stem = os.path.splitext(f)[0]
                 item = QtWidgets.QListWidgetItem(f)
                 item.setData(QtCore.Qt.UserRole, full_p)
-                thumb = self.find_thumbnail_for_mat(full_p)
-                if thumb: item.setIcon(QtGui.QIcon(thumb))
-                else: item.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_FileIcon))
+                icon = self.thumb_service.icon(full_p)
+                preview = images.get(stem.lower())
+                if icon is None and preview:
+                    pending.append({'path': full_p, 'name': stem, 'preview': os.path.join(folder, preview)})
+                    icon = self.mat_placeholder
+                item.setIcon(icon or file_icon)
+                self.mat_items[full_p] = item
                 self.mat_list.addItem(item)
+        finally:
+            self.mat_list.setUpdatesEnabled(True)
+        self.mat_search.reset()
+        if self.input_search_mat.text().strip(): self.filter_materials(self.input_search_mat.text())
+        self.load_material_thumbnails(pending)
+
+    def load_material_thumbnails(self, items):
+        """Decodifica os previews dos materiais em segundo plano (mesmo pipeline do Asset Manager)."""
+        if self.mat_thumb_job: self.mat_thumb_job.stop()
+        self.mat_thumb_job = None
+        if not items: return
+        size = self.mat_list.iconSize()
+        job = self.thumb_service.create_job(items, thumb_size=(size.width(), size.height()), caption=False)
+        job.signals.results_ready.connect(self.thumb_service.put_images)
+        job.signals.finished.connect(self.update_cache_size_label)
+        self.mat_thumb_job = job
+        job.start()
+
+    def on_material_icons_updated(self, paths):
+        for path in paths:
+            item = self.mat_items.get(path)
+            if item is not None: item.setIcon(self.thumb_service.icon(path))
 
     def update_material_info_mat(self, item):
         if not item: return
@@ -562,36 +659,43 @@ class NoobToolsWindow(QtWidgets.QWidget):
         prog.setWindowModality(QtCore.Qt.WindowModal)
         prog.show()
         
-        for i in range(count):
-            if prog.wasCanceled(): break
-            it = self.mat_list.item(i)
-            path = it.data(QtCore.Qt.UserRole)
-            name = it.text()
-            out = os.path.splitext(path)[0] + ".jpg"
-            
-            prog.setLabelText("Renderizando: " + name)
-            prog.setValue(i)
-            # QtWidgets.QApplication.processEvents() # Estabilidade
-            
-            # Chama a função no MaxScript
-            success = rt.NoobToolsCoreInst.renderMaterialPreview(path, name, out)
-            if success:
-                it.setIcon(QtGui.QIcon(out))
+        # O palco (esfera, luzes, câmera) é montado uma vez; os materiais vão em lotes
+        # para o progresso/cancelamento responderem sem uma chamada ao Max por material
+        items = [self.mat_list.item(i) for i in range(count)]
+        rendered, skipped, failed = [], 0, 0
+        if not rt.NoobToolsCoreInst.beginPreviewStage():
+            prog.close()
+            self.show_toast("Falha ao montar o palco de preview.")
+            return
+        try:
+            for start in range(0, count, self.MAT_PREVIEW_BATCH):
+                if prog.wasCanceled(): break
+                chunk = items[start:start + self.MAT_PREVIEW_BATCH]
+                paths = [it.data(QtCore.Qt.UserRole) for it in chunk]
+                names = [it.text() for it in chunk]
+                outs = [os.path.splitext(p)[0] + ".jpg" for p in paths]
+                prog.setLabelText("Renderizando: {} ({}-{} de {})".format(names[0], start + 1, start + len(chunk), count))
+                prog.setValue(start)
+                
+                results = list(rt.NoobToolsCoreInst.renderMaterialPreviewBatch(paths, names, outs))
+                for path, name, out, status in zip(paths, names, outs, results):
+                    if status == 1:
+                        self.thumb_service.invalidate([path])
+                        rendered.append({'path': path, 'name': os.path.splitext(name)[0], 'preview': out})
+                    elif status == 0: skipped += 1
+                    else: failed += 1
+        finally:
+            rt.NoobToolsCoreInst.endPreviewStage()
         
         prog.setValue(count)
-        self.show_toast("Pre-visualizações geradas com sucesso!")
-
-    def find_thumbnail_for_mat(self, mat_file):
-        base = os.path.splitext(mat_file)[0]
-        for ext in [".jpg", ".png", ".jpeg"]:
-            if os.path.exists(base + ext): return base + ext
-        return None
+        # Um job só para tudo o que foi renderizado (um novo job cancelaria o anterior)
+        self.load_material_thumbnails(rendered)
+        log_info("Material previews: {} renderizados, {} já atualizados, {} falhas".format(len(rendered), skipped, failed))
+        self.show_toast("Previews: {} gerados, {} já atualizados{}".format(
+            len(rendered), skipped, ", {} falhas".format(failed) if failed else ""))
 
     def filter_materials(self, txt):
-        txt = txt.lower()
-        for i in range(self.mat_list.count()):
-            it = self.mat_list.item(i)
-            it.setHidden(txt not in it.text().lower())
+        self.mat_search.filter(txt.lower().split(), lambda row, terms: all(t in self.mat_list.item(row).text().lower() for t in terms))
 
     def on_material_double_clicked(self, item):
         mat_file = item.data(QtCore.Qt.UserRole)
@@ -680,13 +784,49 @@ class NoobToolsWindow(QtWidgets.QWidget):
         self.chk_autobackup = QtWidgets.QCheckBox("Auto-backup before operations")
         self.chk_autobackup.setChecked(self.settings.get('enable_autobackup', True))
         layout_backup.addWidget(self.chk_autobackup)
+        layout_backup_limits = QtWidgets.QHBoxLayout()
+        self.spn_backup_keep = QtWidgets.QSpinBox(); self.spn_backup_keep.setRange(1, 100)
+        self.spn_backup_keep.setValue(self.settings.get('backup_keep', DEFAULT_KEEP))
+        self.spn_backup_mb = QtWidgets.QSpinBox(); self.spn_backup_mb.setRange(256, 262144); self.spn_backup_mb.setSingleStep(512)
+        self.spn_backup_mb.setValue(self.settings.get('backup_max_mb', DEFAULT_BACKUP_MB))
+        self.spn_backup_window = QtWidgets.QSpinBox(); self.spn_backup_window.setRange(0, 3600); self.spn_backup_window.setSingleStep(30)
+        self.spn_backup_window.setValue(self.settings.get('backup_window_s', DEFAULT_WINDOW))
+        self.spn_backup_window.setToolTip("Intervalo mínimo entre dois backups da mesma cena.")
+        layout_backup_limits.addWidget(QtWidgets.QLabel("Keep:")); layout_backup_limits.addWidget(self.spn_backup_keep)
+        layout_backup_limits.addWidget(QtWidgets.QLabel("Max (MB):")); layout_backup_limits.addWidget(self.spn_backup_mb)
+        layout_backup_limits.addWidget(QtWidgets.QLabel("Interval (s):")); layout_backup_limits.addWidget(self.spn_backup_window)
+        layout_backup.addLayout(layout_backup_limits)
         grupo_backup.setLayout(layout_backup)
         layout_settings.addWidget(grupo_backup)
         
+        grupo_bitmap = QtWidgets.QGroupBox("BITMAP PATHS")
+        layout_bitmap = QtWidgets.QVBoxLayout()
+        layout_bitmap_limit = QtWidgets.QHBoxLayout()
+        layout_bitmap_limit.addWidget(QtWidgets.QLabel("Max paths added by NoobTools:"))
+        self.spn_bitmap_paths = QtWidgets.QSpinBox(); self.spn_bitmap_paths.setRange(1, 500)
+        self.spn_bitmap_paths.setValue(self.settings.get('bitmap_paths_max', DEFAULT_MAX_PATHS))
+        self.spn_bitmap_paths.setToolTip("Os mais antigos saem da lista do Max quando o limite é passado.")
+        layout_bitmap_limit.addWidget(self.spn_bitmap_paths)
+        self.chk_bitmap_session = QtWidgets.QCheckBox("Remove paths added by NoobTools on close")
+        self.chk_bitmap_session.setChecked(self.settings.get('bitmap_paths_session', False))
+        self.btn_clear_bitmap_paths = QtWidgets.QPushButton("Remove NoobTools Bitmap Paths")
+        layout_bitmap.addLayout(layout_bitmap_limit)
+        layout_bitmap.addWidget(self.chk_bitmap_session); layout_bitmap.addWidget(self.btn_clear_bitmap_paths)
+        grupo_bitmap.setLayout(layout_bitmap)
+        layout_settings.addWidget(grupo_bitmap)
+
         grupo_cache = QtWidgets.QGroupBox("CACHE")
         layout_cache = QtWidgets.QVBoxLayout()
+        layout_cache_limit = QtWidgets.QHBoxLayout()
+        layout_cache_limit.addWidget(QtWidgets.QLabel("Max Cache Size (MB):"))
+        self.spn_cache_mb = QtWidgets.QSpinBox()
+        self.spn_cache_mb.setRange(16, 65536)
+        self.spn_cache_mb.setSingleStep(64)
+        self.spn_cache_mb.setValue(self.settings.get('thumb_cache_mb', DEFAULT_MAX_MB))
+        layout_cache_limit.addWidget(self.spn_cache_mb)
         self.btn_clear_cache = QtWidgets.QPushButton("Clear Thumbnail Cache")
         self.lbl_cache_size = QtWidgets.QLabel("Calculating...")
+        layout_cache.addLayout(layout_cache_limit)
         layout_cache.addWidget(self.btn_clear_cache); layout_cache.addWidget(self.lbl_cache_size)
         grupo_cache.setLayout(layout_cache)
         layout_settings.addWidget(grupo_cache)
@@ -696,7 +836,12 @@ class NoobToolsWindow(QtWidgets.QWidget):
         self.btn_clear_cache.clicked.connect(self.manual_clear_cache)
         self.btn_browse_mat.clicked.connect(self.browse_mat_lib)
         self.chk_autobackup.stateChanged.connect(self.save_all_settings)
+        for spn in (self.spn_backup_keep, self.spn_backup_mb, self.spn_backup_window): spn.valueChanged.connect(self.on_backup_limits_changed)
+        self.spn_bitmap_paths.valueChanged.connect(self.on_bitmap_paths_limit_changed)
+        self.chk_bitmap_session.stateChanged.connect(self.save_all_settings)
+        self.btn_clear_bitmap_paths.clicked.connect(self.clear_bitmap_paths)
         self.edt_mat_path.textChanged.connect(self.save_all_settings)
+        self.spn_cache_mb.valueChanged.connect(self.on_cache_limit_changed)
         self.update_cache_size_label()
 
     # ==========================================================================
@@ -715,29 +860,69 @@ class NoobToolsWindow(QtWidgets.QWidget):
     def refresh_ui(self):
         self.combo_category.blockSignals(True)
         self.combo_category.clear()
-        if os.path.isdir(self.root_path):
+        if self.root_path:
             try:
-                categories = [d for d in os.listdir(self.root_path) if os.path.isdir(os.path.join(self.root_path, d))]
-                self.combo_category.addItems(sorted(categories))
-            except Exception: pass
+                self.library_index.sync_dir(self.root_path, depth=0)
+                categories = [r['name'] for r in self.library_index.children(self.root_path)]
+                self.combo_category.addItems(categories)
+            except Exception as e: log_error("Falha ao ler o índice da biblioteca: " + str(e))
         self.combo_category.blockSignals(False)
         self.combo_subcategory.clear()
         self.combo_subcategory.setVisible(False)
+        if self.search_index is not None and self.search_index.root != self.root_path: self.search_index = None
         if self.combo_category.count() > 0: self.on_category_changed()
-        else: self.asset_list.clear()
+        else: self.fill_asset_grid([])
+        self.start_index_refresh()
+
+    def start_index_refresh(self):
+        """Revalida o índice da biblioteca em background; a UI só é recarregada se algo mudou."""
+        if not self.root_path: return
+        if self.index_worker: self.index_worker.stop()
+        self.index_worker = LibraryIndexWorker(self.library_index.db_path, self.root_path)
+        self.index_worker.signals.index_updated.connect(self.on_library_index_updated)
+        self.index_worker.signals.search_ready.connect(self.on_search_index_ready)
+        self.threadpool.start(self.index_worker)
+
+    def on_search_index_ready(self, search_index):
+        if search_index.root != self.root_path: return
+        self.search_index = search_index
+        if self.input_search.text().split(): self.filter_assets(self.input_search.text())
+
+    def on_library_index_updated(self, root, changed):
+        if root != self.root_path: return
+        changed = set(changed)
+        self.thumb_service.invalidate(changed)
+        category = self.combo_category.currentText()
+        category_path = os.path.join(self.root_path, category) if category else ""
+        if self.root_path in changed or category_path in changed or os.path.dirname(self.current_asset_folder) in changed:
+            self.reload_asset_view(category, self.combo_subcategory.currentText())
+        elif self.current_asset_folder in changed or any(os.path.dirname(p) == self.current_asset_folder for p in changed):
+            self.populate_asset_grid(self.current_asset_folder)
+
+    def reload_asset_view(self, category, sub):
+        """Recarrega categorias/subpastas a partir do índice preservando a seleção atual."""
+        self.combo_category.blockSignals(True)
+        self.combo_category.clear()
+        self.combo_category.addItems([r['name'] for r in self.library_index.children(self.root_path)])
+        idx = self.combo_category.findText(category)
+        if idx >= 0: self.combo_category.setCurrentIndex(idx)
+        self.combo_category.blockSignals(False)
+        if self.combo_category.count() == 0:
+            self.fill_asset_grid([]); return
+        self.pending_subcategory = sub
+        self.on_category_changed()
+        self.pending_subcategory = ""
 
     def on_category_changed(self):
         category = self.combo_category.currentText()
         if not category or not self.root_path: return
         category_path = os.path.join(self.root_path, category)
-        if not os.path.isdir(category_path): return
+        self.library_index.sync_dir(category_path, depth=1)
+        if self.library_index.get(category_path) is None: return
 
-        subfolders = [f for f in os.listdir(category_path) if os.path.isdir(os.path.join(category_path, f))]
-        has_direct_assets = False
-        for sub in subfolders:
-            sub_path = os.path.join(category_path, sub)
-            if any(glob.glob(os.path.join(sub_path, ext)) for ext in ["*.max", "*.fbx", "*.obj", "*.3ds"]):
-                has_direct_assets = True; break
+        rows = self.library_index.children(category_path)
+        subfolders = [r['name'] for r in rows]
+        has_direct_assets = any(LibraryIndex.has_models(r) for r in rows)
 
         if has_direct_assets:
             self.combo_subcategory.setVisible(False)
@@ -745,11 +930,13 @@ class NoobToolsWindow(QtWidgets.QWidget):
         else:
             self.combo_subcategory.blockSignals(True)
             self.combo_subcategory.clear()
-            self.combo_subcategory.addItems(sorted(subfolders))
+            self.combo_subcategory.addItems(subfolders)
+            if self.pending_subcategory in subfolders:
+                self.combo_subcategory.setCurrentIndex(subfolders.index(self.pending_subcategory))
             self.combo_subcategory.setVisible(True)
             self.combo_subcategory.blockSignals(False)
             if subfolders: self.on_subcategory_changed()
-            else: self.asset_list.clear()
+            else: self.fill_asset_grid([])
 
     def on_subcategory_changed(self):
         category = self.combo_category.currentText()
@@ -759,75 +946,137 @@ class NoobToolsWindow(QtWidgets.QWidget):
         self.populate_asset_grid(asset_path)
 
     def populate_asset_grid(self, folder_path):
-        self.asset_list.clear()
-        if self.current_worker:
-            self.current_worker.stop()
-            self.threadpool.waitForDone(500)
-            self.current_worker = None
-
-        if not os.path.isdir(folder_path): return
-
-        asset_folders = [f for f in os.listdir(folder_path) if os.path.isdir(os.path.join(folder_path, f))]
-        self.lbl_info_count.setText("Items: {}".format(len(asset_folders)))
-
-        assets_to_load = []
-        for name in asset_folders:
-            path = os.path.join(folder_path, name)
-            item = QtWidgets.QListWidgetItem(name)
-            item.setData(QtCore.Qt.UserRole, path)
-            pix = QtGui.QPixmap(170, 160); pix.fill(QtGui.QColor(36, 36, 38))
-            painter = QtGui.QPainter(pix); painter.setPen(QtGui.QColor(100,100,100))
-            painter.drawText(pix.rect(), QtCore.Qt.AlignCenter, "Loading...")
-            painter.end()
-            item.setIcon(QtGui.QIcon(pix))
-            self.asset_list.addItem(item)
-            assets_to_load.append({'path': path, 'name': name})
-
-        if assets_to_load:
-            worker = ThumbnailLoader(assets_to_load, self.cache_dir)
-            worker.signals.result_ready.connect(self.update_thumbnail)
-            worker.signals.progress.connect(self.update_thumbnail_progress)
-            self.current_worker = worker
-            self.threadpool.start(worker)
-
-    def update_thumbnail(self, path, icon):
-        for i in range(self.asset_list.count()):
-            it = self.asset_list.item(i)
-            if it.data(QtCore.Qt.UserRole) == path:
-                it.setIcon(icon); break
+        self.current_asset_folder = folder_path
+        self.library_index.sync_dir(folder_path, depth=1)
+        if self.input_search.text().split() and self.search_index is not None:
+            # Busca ativa é sempre na biblioteca inteira: mantém os resultados
+            self.filter_assets(self.input_search.text()); return
+        self.show_folder_assets()
+        if self.current_format_filter(): self.filter_assets(self.input_search.text())
+
+    def show_folder_assets(self):
+        self.search_active = False
+        entries = []
+        rows = []
+        if self.library_index.get(self.current_asset_folder) is not None:
+            rows = self.library_index.children(self.current_asset_folder)
+            for row in rows:
+                entries.append({'path': row['path'], 'name': row['name'], 'category': "",
+                                'formats': LibraryIndex.formats_of(row), 'preview': LibraryIndex.preview_of(row),
+                                'tags': LibraryIndex.tags_of(row)})
+        self.fill_asset_grid(entries)
+        self.queue_renderer_detection(rows)
+
+    # --------------------------------------------------------------------------
+    # Renderer (cache por caminho + os.stat, detecção em background sem pymxs)
+    # --------------------------------------------------------------------------
+    def queue_renderer_detection(self, rows):
+        """Detecta (ou lê do cache) o renderer dos .max da pasta numa thread."""
+        if self.renderer_worker: self.renderer_worker.stop()
+        items = [(row['path'], row['main_file']) for row in rows
+                 if row['main_file'] and row['main_file'].lower().endswith(".max")]
+        self.renderer_worker = RendererDetectWorker(items, self.renderer_cache) if items else None
+        if self.renderer_worker:
+            self.renderer_worker.signals.scan_result.connect(self.on_renderers_detected)
+            self.threadpool.start(self.renderer_worker)
+
+    def on_renderers_detected(self, renderers):
+        self.asset_model.set_renderers(renderers)
+        if self.info_folder in renderers: self.lbl_info_renderer.setText(renderers[self.info_folder])
+
+    def fill_asset_grid(self, entries, show_category=False):
+        # O job anterior é cancelado pelo scheduler; as miniaturas só são pedidas para o que estiver na tela
+        self.thumb_scheduler.stop()
+        if self.renderer_worker: self.renderer_worker.stop()
+        self.renderer_worker = None
+        self.asset_model.set_entries(entries, show_category)
+        self.asset_search.reset()
+        self.lbl_info_count.setText("Items: {}".format(len(entries)))
+
+    def selected_asset_paths(self):
+        rows = sorted(i.row() for i in self.asset_list.selectionModel().selectedIndexes())
+        return [self.asset_model.path_at(r) for r in rows]
 
     def update_thumbnail_progress(self, progress, message):
         self.status_label.setText(message)
         if progress >= 100: QtCore.QTimer.singleShot(2000, lambda: self.status_label.setText("Ready"))
 
     def handle_dropped_files(self, files):
+        folders = []
         for f in files:
-            if os.path.isfile(f): self.import_single_asset(os.path.dirname(f))
+            if os.path.isfile(f) and os.path.dirname(f) not in folders: folders.append(os.path.dirname(f))
+        if len(folders) > 1: self.import_assets_batch(folders)
+        elif folders: self.import_single_asset(folders[0])
 
     def find_main_file(self, folder):
-        for ext in ["*.max", "*.fbx", "*.obj", "*.3ds", "*.mat"]:
-            found = glob.glob(os.path.join(folder, ext))
-            if found:
-                found.sort(key=lambda x: os.path.getmtime(x), reverse=True)
-                return found[0]
-        return None
+        row = self.library_index.get(folder)
+        if row is None or row['mtime'] is None:
+            self.library_index.sync_dir(folder, depth=0)
+            row = self.library_index.get(folder)
+        return row['main_file'] if row is not None else None
 
     def run_import_logic(self):
-        items = self.asset_list.selectedItems()
+        items = self.selected_asset_paths()
         if not items: return
         self.progress_bar.setValue(0)
         
         if len(items) > 1:
             if QtWidgets.QMessageBox.question(self, "Batch", "Import {} assets?".format(len(items)), QtWidgets.QMessageBox.Yes|QtWidgets.QMessageBox.No) == QtWidgets.QMessageBox.Yes:
-                total = len(items)
-                for idx, it in enumerate(items):
-                    self.import_single_asset(it.data(QtCore.Qt.UserRole), silent=True)
-                    val = int(float(idx + 1) / total * 100)
-                    self.progress_bar.setValue(val)
-                    QtWidgets.QApplication.processEvents()
-                QtCore.QTimer.singleShot(1500, lambda: self.progress_bar.setValue(0))
+                self.import_assets_batch(items)
         else:
-            self.import_single_asset(items[0].data(QtCore.Qt.UserRole), silent=False)
+            self.import_single_asset(items[0], silent=False)
+
+    def import_assets_batch(self, folders):
+        """Importa vários assets como uma operação só: um backup, bitmap paths sem
+        repetição, merges com undo e redraw desligados, um ATS refresh e um redraw no fim."""
+        jobs = [(folder, self.resolve_main_file(folder)) for folder in folders]
+        jobs = [(folder, main_file) for folder, main_file in jobs if main_file]
+        if not jobs:
+            self.show_toast("Erro: Nenhum arquivo 3D ou .mat encontrado.")
+            return
+        rt = pymxs.runtime
+        start = time.time()
+        self.progress_bar.setValue(0)
+        self.create_backup()
+        dirs, missing = [], []
+        for folder, main_file in jobs:
+            asset_dirs, asset_missing = self.asset_texture_plan(folder, main_file)
+            dirs.extend(d for d in asset_dirs if d not in dirs)
+            missing.extend(asset_missing)
+        if self.bitmap_paths.ensure(dirs): self.save_all_settings()
+        if missing: log_warning("Import: {} texturas não encontradas: {}".format(len(missing), ", ".join(missing[:20])))
+
+        timings, errors = [], []
+        last_ui = 0.0
+        try:
+            with pymxs.undo(False), pymxs.redraw(False):
+                for idx, (folder, main_file) in enumerate(jobs):
+                    t0 = time.time()
+                    try: self.merge_asset(folder, main_file)
+                    except Exception as e:
+                        errors.append((folder, str(e)))
+                        log_error("Import {}: {}".format(folder, e))
+                    timings.append((time.time() - t0, os.path.basename(folder)))
+                    # Barra de progresso sem processar a fila inteira a cada asset
+                    if time.time() - last_ui > 0.25:
+                        self.progress_bar.setValue(int(100.0 * (idx + 1) / len(jobs)))
+                        self.progress_bar.repaint()
+                        last_ui = time.time()
+        finally:
+            refresh_asset_tracker()
+            rt.redrawViews()
+
+        total = time.time() - start
+        for seconds, name in sorted(timings, reverse=True):
+            log_info("Import: {} em {:.2f}s".format(name, seconds))
+        log_info("Import em lote: {} assets em {:.2f}s".format(len(jobs), total))
+        self.progress_bar.setValue(100)
+        QtCore.QTimer.singleShot(1500, lambda: self.progress_bar.setValue(0))
+        msg = "{} assets importados em {:.1f}s".format(len(jobs) - len(errors), total)
+        if timings: msg += " (mais lento: {} {:.1f}s)".format(max(timings)[1], max(timings)[0])
+        if errors: msg += " | {} com erro (veja o log)".format(len(errors))
+        if missing: msg += " | {} texturas faltando".format(len(missing))
+        self.show_toast(msg)
 
     def update_recent_favorites(self, folder):
         """Adiciona aos favoritos se for importado frequentemente."""
@@ -835,8 +1084,54 @@ class NoobToolsWindow(QtWidgets.QWidget):
             # Lógica simples: se importar, vira favorito temporário ou entra numa lista 'Recent'
             self.show_toast("Asset adicionado aos recentes.")
 
-    def import_single_asset(self, folder, silent=False):
+    def resolve_main_file(self, folder):
         main_file = self.find_main_file(folder)
+        if main_file and not os.path.exists(main_file):
+            # Índice desatualizado (arquivo renomeado/removido): relista só esta pasta
+            self.library_index.sync_dir(folder, depth=0)
+            main_file = self.find_main_file(folder)
+        return main_file
+
+    def asset_texture_plan(self, folder, main_file):
+        """(pastas de bitmap que o asset precisa, texturas não achadas), pelo manifesto do .max
+        lido em Python (sem merge nem ATS). Sem manifesto, as pastas padrão do asset."""
+        if not main_file.lower().endswith(".max"): return asset_bitmap_dirs(folder), []
+        assets = self.library_index.get_dependencies(folder)
+        if assets is None:
+            assets = LibraryIndex.read_dependencies(main_file)
+            row = self.library_index.get(folder)
+            if assets is not None and row is not None:
+                self.library_index.set_dependencies(folder, main_file, row['size'], row['file_mtime'], assets)
+        if not assets: return asset_bitmap_dirs(folder), []
+        return resolve_dependencies(folder, assets)
+
+    def merge_asset(self, folder, main_file):
+        """Só o merge/import e a organização (layer, prefixo); backup, bitmap paths e ATS ficam com quem chama."""
+        rt = pymxs.runtime
+        rt.clearSelection()
+        ext = main_file.lower()
+        if ext.endswith(".max"):
+            try:
+                merge_dups = rt.Name("mergeDups")
+                use_scene_mtl = rt.Name("useSceneMtlDups")
+                select_opt = rt.Name("select")
+                rt.mergeMAXFile(main_file, merge_dups, use_scene_mtl, select_opt)
+            except AttributeError:
+                rt.mergeMAXFile(main_file)
+        elif ext.endswith(".mat"):
+            rt.loadMaterialLibrary(main_file)
+        elif ext.endswith((".fbx", ".obj", ".3ds")):
+            rt.importFile(main_file)
+
+        if self.chk_auto_layer.isChecked():
+            lname = "".join(c for c in os.path.basename(folder) if c.isalnum() or c in ('_','-'))
+            rt.NoobToolsCoreInst.addSelectionToLayer(lname)
+        
+        if self.chk_prefix.isChecked() and self.txt_prefix.text():
+            rt.NoobToolsCoreInst.renameSelection(self.txt_prefix.text(), "")
+
+    def import_single_asset(self, folder, silent=False):
+        main_file = self.resolve_main_file(folder)
         if not main_file:
             if not silent: self.show_toast("Erro: Nenhum arquivo 3D ou .mat encontrado.")
             return
@@ -847,35 +1142,18 @@ class NoobToolsWindow(QtWidgets.QWidget):
 
         if self.settings.get('enable_autobackup', True): self.create_backup()
 
-        setup_bitmap_paths_for_asset(folder)
-        rt = pymxs.runtime
-        rt.clearSelection()
+        dirs, missing = self.asset_texture_plan(folder, main_file)
+        if self.bitmap_paths.ensure(dirs): self.save_all_settings()
+        if missing:
+            log_warning("Import {}: texturas não encontradas: {}".format(os.path.basename(folder), ", ".join(missing)))
+            self.show_toast("Aviso: {} texturas não encontradas (veja o log)".format(len(missing)))
         
         try:
-            ext = main_file.lower()
-            if ext.endswith(".max"):
-                try:
-                    merge_dups = rt.Name("mergeDups")
-                    use_scene_mtl = rt.Name("useSceneMtlDups")
-                    select_opt = rt.Name("select")
-                    rt.mergeMAXFile(main_file, merge_dups, use_scene_mtl, select_opt)
-                except AttributeError:
-                    rt.mergeMAXFile(main_file)
-            elif ext.endswith(".mat"):
-                rt.loadMaterialLibrary(main_file)
-                self.show_toast("Material Library Carregada!")
-            elif ext.endswith((".fbx", ".obj", ".3ds")):
-                rt.importFile(main_file)
+            self.merge_asset(folder, main_file)
+            if main_file.lower().endswith(".mat"): self.show_toast("Material Library Carregada!")
 
             refresh_asset_tracker()
             self.update_recent_favorites(folder)
-
-            if self.chk_auto_layer.isChecked():
-                lname = "".join(c for c in os.path.basename(folder) if c.isalnum() or c in ('_','-'))
-                rt.NoobToolsCoreInst.addSelectionToLayer(lname)
-            
-            if self.chk_prefix.isChecked() and self.txt_prefix.text():
-                rt.NoobToolsCoreInst.renameSelection(self.txt_prefix.text(), "")
             
             if not silent: 
                 self.progress_bar.setValue(100)
@@ -902,29 +1180,55 @@ class NoobToolsWindow(QtWidgets.QWidget):
             self.btn_run_relink.setEnabled(True)
 
     def scan_missing_files(self):
+        """Pega a lista de caminhos do Max numa chamada e verifica a existência em background."""
+        try:
+            # Edições manuais no Material Editor não disparam callback: o scan é o ponto de recomeço do índice de mapas
+            pymxs.runtime.NoobToolsCoreInst.invalidateMapIndex()
+            paths = list(pymxs.runtime.NoobToolsCoreInst.getAssetPaths())
+        except Exception as e:
+            log_error("Scan: " + str(e))
+            return
+        if self.missing_worker: self.missing_worker.stop()
+        # Os que faltavam são sempre verificados de novo (podem ter sido copiados/relinkados)
+        self.file_status.invalidate(self.missing_assets)
+        self.lbx_missing.clear()
+        self.lbx_missing.addItem("Verificando {} arquivos...".format(len(paths)))
+        self.btn_scan_missing.setEnabled(False)
+        self.missing_worker = MissingFilesWorker(paths, self.file_status)
+        self.missing_worker.signals.results_ready.connect(self.on_missing_scanned)
+        self.missing_worker.signals.error.connect(self.on_missing_scan_failed)
+        self.threadpool.start(self.missing_worker)
+
+    def on_missing_scanned(self, missing):
+        self.btn_scan_missing.setEnabled(True)
+        self.lbx_missing.clear()
+        self.missing_assets = list(missing)
+        if not self.missing_assets:
+            self.lbx_missing.addItem("-- CENA LIMPA --")
+            self.edt_selected_missing.setText("")
+            self.btn_strip.setEnabled(False)
+            self.lbl_info_files.setText("Cena limpa!")
+        else:
+            self.lbx_missing.setUpdatesEnabled(False)
+            self.lbx_missing.addItems(self.missing_assets)
+            self.lbx_missing.setUpdatesEnabled(True)
+            self.btn_strip.setEnabled(True)
+            self.edt_selected_missing.setText("Faltando: {} arquivos".format(len(self.missing_assets)))
+
+    def on_missing_scan_failed(self, message):
+        self.btn_scan_missing.setEnabled(True)
         self.lbx_missing.clear()
         self.missing_assets = []
-        try:
-            rt = pymxs.runtime
-            self.missing_assets = list(rt.NoobToolsCoreInst.getMissingAssets())
-            self.missing_assets = sorted(list(set(self.missing_assets)))
-
-            if not self.missing_assets:
-                self.lbx_missing.addItem("-- CENA LIMPA --")
-                self.edt_selected_missing.setText("")
-                self.btn_strip.setEnabled(False)
-                self.lbl_info_files.setText("Cena limpa!")
-            else:
-                for asset in self.missing_assets: self.lbx_missing.addItem(asset)
-                self.btn_strip.setEnabled(True)
-                self.edt_selected_missing.setText("Faltando: {} arquivos".format(len(self.missing_assets)))
-        except Exception: pass
+        self.lbx_missing.addItem("-- SCAN FALHOU: {} --".format(message))
+        self.edt_selected_missing.setText("")
+        self.btn_strip.setEnabled(False)
+        self.lbl_info_files.setText("Scan falhou (veja o log)")
 
     def on_missing_selected(self, item): self.edt_selected_missing.setText(item.text())
 
     def select_objects_from_missing(self, item):
         path = item.text()
-        if path == "-- CENA LIMPA --": return
+        if path not in self.missing_assets: return
         try:
             count = pymxs.runtime.NoobToolsCoreInst.selectObjectsFromMissing(path)
             if count > 0: self.lbl_info_files.setText("Selecionados: {} objetos".format(count))
@@ -977,7 +1281,12 @@ class NoobToolsWindow(QtWidgets.QWidget):
             except Exception: pass
 
     def collect_files(self):
-        self.create_backup()
+        """Copia as texturas para <cena>/Maps em background; clicar de novo cancela.
+        Uma coleta cancelada continua de onde parou (FileCollector)."""
+        if self.collect_worker:
+            self.collect_worker.stop()
+            self.btn_collect.setEnabled(False)
+            return
         try:
             mp = pymxs.runtime.maxfilepath
             if not mp:
@@ -985,11 +1294,133 @@ class NoobToolsWindow(QtWidgets.QWidget):
                 return
             save_dir = os.path.join(mp, "Maps")
             if QtWidgets.QMessageBox.question(self, "Coletar", "Copiar texturas para:\n{}\nContinuar?".format(save_dir), QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No) == QtWidgets.QMessageBox.No: return
-            
-            count = pymxs.runtime.NoobToolsCoreInst.collectFiles(save_dir)
-            QtWidgets.QMessageBox.information(self, "Sucesso", "Coletados {} arquivos.".format(count))
-            self.scan_missing_files()
-        except Exception: pass
+            self.create_backup()
+            paths = list(pymxs.runtime.NoobToolsCoreInst.getMapPaths())
+        except Exception as e:
+            log_error("Coletar: " + str(e))
+            return
+
+        self.pb_relink.setValue(0)
+        self.lbl_info_files.setText("Coletando {} arquivos...".format(len(paths)))
+        self.btn_collect.setText("CANCELAR COLETA")
+        self.collect_worker = CollectFilesWorker(paths, save_dir)
+        self.collect_worker.signals.progress.connect(self.on_collect_progress)
+        self.collect_worker.signals.results_ready.connect(self.on_collect_finished)
+        self.threadpool.start(self.collect_worker)
+
+    def on_collect_progress(self, progress, message):
+        self.pb_relink.setValue(progress)
+        self.lbl_info_files.setText(message)
+
+    def on_collect_finished(self, result):
+        self.collect_worker = None
+        self.btn_collect.setText("COLETAR (Copy to Project)")
+        self.btn_collect.setEnabled(True)
+        # Mesmo cancelada, o que já está na pasta é relinkado numa chamada só
+        mapping = dict((old, new) for old, new in result['mapping'].items() if old != new)
+        count = 0
+        if mapping:
+            old_paths = sorted(mapping)
+            try: count = pymxs.runtime.NoobToolsCoreInst.relinkFiles(old_paths, [mapping[p] for p in old_paths], setProps=True)
+            except Exception as e: log_error("Coletar: " + str(e))
+        self.scan_missing_files()
+        self.pb_relink.setValue(0)
+        self.lbl_info_files.setText("Coletados: {} arquivos".format(len(mapping)))
+        msg = "Copiados: {} ({:.0f} MB)\nJá estavam na pasta: {}\nMapas atualizados: {}".format(
+            result['copied'], result['bytes'] / 1048576.0, result['skipped'], count)
+        if result['missing']: msg += "\nFaltando na origem: {}".format(len(result['missing']))
+        if result['errors']: msg += "\nErros: {} (veja o log)".format(len(result['errors']))
+        for src, err in result['errors']: log_error("Coletar: {} - {}".format(src, err))
+        if result['cancelled']: msg = "Coleta cancelada - rode de novo para continuar.\n\n" + msg
+        QtWidgets.QMessageBox.information(self, "Coletar", msg)
+
+    def pack_scene(self):
+        """Pack & Go: cópia do .max com caminhos relativos ao pacote + texturas, direto num .zip.
+        Quais texturas existem é verificado em background; a cópia da cena é salva pelo Max
+        (thread da UI) e o empacotamento volta a rodar em background."""
+        if self.pack_check_worker:
+            self.pack_check_worker.stop()
+            self.on_pack_checked(None, None, None)
+            return
+        if self.pack_worker:
+            self.pack_worker.stop()
+            self.btn_pack.setEnabled(False)
+            return
+        try:
+            mf = pymxs.runtime.maxfilename
+            if not mf:
+                QtWidgets.QMessageBox.warning(self, "Erro", "Salve a cena primeiro!")
+                return
+            scene = os.path.splitext(mf)[0]
+            default = os.path.join(pymxs.runtime.maxfilepath, scene + "_pack.zip")
+            archive, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Pack & Go", default, "Zip (*.zip)")
+            if not archive: return
+            paths = list(pymxs.runtime.NoobToolsCoreInst.getMapPaths())
+        except Exception as e:
+            log_error("Pack & Go: " + str(e))
+            return
+
+        # O pacote tem que refletir o disco agora: nada de existência vinda do cache
+        self.file_status.invalidate(paths)
+        self.lbl_info_files.setText("Verificando {} texturas...".format(len(paths)))
+        self.btn_pack.setText("CANCELAR PACK")
+        self.pack_check_worker = MissingFilesWorker(paths, self.file_status)
+        self.pack_check_worker.signals.results_ready.connect(lambda missing: self.on_pack_checked(archive, paths, missing))
+        self.pack_check_worker.signals.error.connect(self.on_pack_check_failed)
+        self.threadpool.start(self.pack_check_worker)
+
+    def on_pack_checked(self, archive, paths, missing):
+        self.pack_check_worker = None
+        if missing is None:
+            self.btn_pack.setText("PACK & GO (.zip)")
+            self.lbl_info_files.setText("Aguardando...")
+            return
+        mf = pymxs.runtime.maxfilename
+        missing = set(missing)
+        existing = [p for p in paths if p not in missing]
+        names = archive_names(existing)
+        old_paths = sorted(names)
+        temp_max = os.path.join(tempfile.gettempdir(), "NoobTools_pack_{}.max".format(os.getpid()))
+        self.lbl_info_files.setText("Salvando cópia da cena...")
+        QtWidgets.QApplication.processEvents()
+        try: saved = pymxs.runtime.NoobToolsCoreInst.saveSceneCopy(temp_max, old_paths, [max_relative(names[p]) for p in old_paths])
+        except Exception as e:
+            log_error("Pack & Go: " + str(e))
+            saved = False
+        if not mf or not saved or not os.path.isfile(temp_max):
+            QtWidgets.QMessageBox.warning(self, "Erro", "Não foi possível salvar a cópia da cena.")
+            self.btn_pack.setText("PACK & GO (.zip)")
+            self.lbl_info_files.setText("Aguardando...")
+            return
+
+        entries = [(temp_max, mf)] + [(p, names[p]) for p in old_paths]
+        self.pack_missing = len(missing)
+        self.pb_relink.setValue(0)
+        self.pack_worker = PackSceneWorker(archive, entries, cleanup=[temp_max])
+        self.pack_worker.signals.progress.connect(self.on_collect_progress)
+        self.pack_worker.signals.results_ready.connect(self.on_pack_finished)
+        self.threadpool.start(self.pack_worker)
+
+    def on_pack_check_failed(self, message):
+        self.on_pack_checked(None, None, None)
+        QtWidgets.QMessageBox.warning(self, "Pack & Go", "Não foi possível verificar as texturas:\n" + message)
+
+    def on_pack_finished(self, result):
+        archive = self.pack_worker.archive_path if self.pack_worker else ""
+        self.pack_worker = None
+        self.btn_pack.setText("PACK & GO (.zip)")
+        self.btn_pack.setEnabled(True)
+        self.pb_relink.setValue(0)
+        self.lbl_info_files.setText("Aguardando...")
+        for src, err in result['errors']: log_error("Pack & Go: {} - {}".format(src, err))
+        if result['cancelled']:
+            self.show_toast("Pack & Go cancelado")
+            return
+        msg = "{}\n\nArquivos: {} ({:.0f} MB)".format(archive, result['files'], result['bytes'] / 1048576.0)
+        missing = self.pack_missing + len(result['missing'])
+        if missing: msg += "\nFaltando (não incluídos): {}".format(missing)
+        if result['errors']: msg += "\nErros: {} (veja o log)".format(len(result['errors']))
+        QtWidgets.QMessageBox.information(self, "Pack & Go", msg)
 
     def start_relink_scanner(self):
         if not self.relink_path or not os.path.isdir(self.relink_path): return
@@ -1006,96 +1437,92 @@ class NoobToolsWindow(QtWidgets.QWidget):
             self.scanner_worker.stop()
             self.threadpool.waitForDone(500)
 
-        self.scanner_worker = RelinkScannerWorker(self.relink_path, self.chk_subfolders.isChecked())
+        self.scanner_worker = RelinkScannerWorker(self.relink_path, self.chk_subfolders.isChecked(), self.relink_index_path,
+                                                  self.missing_assets, self.chk_ignore_ext.isChecked(), self.chk_fuzzy.isChecked())
+        self.scanner_worker.signals.progress.connect(self.on_relink_progress)
+        self.scanner_worker.signals.results_ready.connect(self.on_relink_partial)
         self.scanner_worker.signals.scan_result.connect(self.process_relink_results)
         self.threadpool.start(self.scanner_worker)
 
-    def process_relink_results(self, file_dict):
+    def on_relink_progress(self, progress, message):
+        self.lbl_info_files.setText(message)
+
+    def on_relink_partial(self, matches):
+        if self.missing_assets:
+            self.pb_relink.setValue(int(50.0 * len(matches) / len(self.missing_assets)))
+
+    def process_relink_results(self, plan_data):
+        """Só aplica o plano calculado pelo RelinkPlanner (src/core/relink_planner.py)."""
         self.pb_relink.setValue(50)
+        plan = RelinkPlan.from_dict(plan_data)
+        matches = plan.mapping()
         
-        if not file_dict:
-            QtWidgets.QMessageBox.warning(self, "Erro", "Nenhum arquivo encontrado na pasta!")
+        if not matches:
+            QtWidgets.QMessageBox.warning(self, "Erro", "Nenhum arquivo correspondente encontrado na pasta!")
             self.btn_run_relink.setEnabled(True)
             self.lbl_info_files.setText("Aguardando...")
             self.pb_relink.setValue(0)
             return
 
-        self.lbl_info_files.setText("Relinkando...")
-        rt = pymxs.runtime
+        self.lbl_info_files.setText("Relinkando {} arquivos...".format(len(matches)))
+        QtWidgets.QApplication.processEvents()
+        # Uma chamada só: o MaxScript agrupa por pasta de destino e faz um único ATS refresh
+        old_paths = sorted(matches)
+        new_paths = [matches[p] for p in old_paths]
         relink_count = 0
-        has_atsobs = False
         try:
-            rt.ATSOps.Visible = False
-            rt.ATSOps.ClearSelection()
-            has_atsobs = True
-        except Exception: pass
-
-        if not has_atsobs:
-            QtWidgets.QMessageBox.warning(self, "Erro", "ATSOps não disponível nesta versão.")
-            self.pb_relink.setValue(0); self.btn_run_relink.setEnabled(True)
-            return
-
-        total = len(self.missing_assets)
-        for i, missing_path in enumerate(self.missing_assets):
-            try:
-                missing_name = os.path.basename(missing_path)
-                search_key = os.path.splitext(missing_name.lower())[0]
-                
-                if search_key in file_dict:
-                    candidates = file_dict[search_key]
-                    best_match = None
-                    
-                    for cand in candidates:
-                        if not self.chk_ignore_ext.isChecked():
-                            if os.path.splitext(missing_path)[1].lower() == os.path.splitext(cand)[1].lower():
-                                best_match = cand; break
-                        else:
-                            best_match = cand; break
-
-                    if best_match:
-                        rt.ATSOps.ClearSelection()
-                        rt.ATSOps.SelectFiles([missing_path])
-                        rt.ATSOps.RetargetSelection(best_match)
-                        relink_count += 1
-            except Exception: pass
-            
-            self.pb_relink.setValue(50 + int((float(i+1)/total)*50))
-            QtWidgets.QApplication.processEvents()
-
-        try: rt.ATSOps.Refresh()
-        except Exception: pass
+            relink_count = pymxs.runtime.NoobToolsCoreInst.relinkFiles(old_paths, new_paths, setProps=self.chk_direct_props.isChecked())
+        except Exception as e: log_error("Relink: " + str(e))
         
         self.scan_missing_files()
         self.pb_relink.setValue(100)
         self.lbl_info_files.setText("Recuperados: {}".format(relink_count))
         self.btn_run_relink.setEnabled(True)
-        QtWidgets.QMessageBox.information(self, "Resultado", "Relinkados: {}".format(relink_count))
+        msg = "Relinkados: {}".format(relink_count)
+        if plan.count('fuzzy'): msg += "\n({} por nome parecido - confira no Asset Tracking)".format(plan.count('fuzzy'))
+        if plan.unmatched: msg += "\nSem candidato: {}".format(len(plan.unmatched))
+        QtWidgets.QMessageBox.information(self, "Resultado", msg)
 
     def create_backup(self):
+        """Snapshot da cena antes de uma operação destrutiva (BackupManager decide se precisa).
+        O save é do Max; hash, dedupe e rotação rodam em background."""
         if not self.settings.get('enable_autobackup', True): return
         try:
-            mf = pymxs.runtime.maxfilepath
-            if mf:
-                bd = os.path.join(os.path.dirname(mf), "_backup")
-                if not os.path.exists(bd): os.makedirs(bd)
-                bf = os.path.join(bd, "{}_{}.max".format(os.path.splitext(os.path.basename(mf))[0], datetime.now().strftime("%H%M%S")))
-                pymxs.runtime.saveMaxFile(bf, quiet=True)
-        except Exception: pass
-
-    def on_selection_changed(self): self.btn_import.setEnabled(len(self.asset_list.selectedItems()) > 0)
-
-    def update_asset_info(self, item):
-        f = self.find_main_file(item.data(QtCore.Qt.UserRole))
+            rt = pymxs.runtime
+            if not rt.maxfilename: return
+            scene = os.path.join(rt.maxfilepath, rt.maxfilename)
+            ok, reason = self.backup_manager.should_backup(scene, rt.getSaveRequired())
+            if not ok:
+                log_info("Backup ignorado: " + reason)
+                return
+            temp = self.backup_manager.snapshot_path(scene)
+            # useNewFile:false - a cena aberta continua sendo o arquivo original;
+            # clearNeedSaveFlag:false - o backup não marca o trabalho do usuário como salvo
+            if not rt.saveMaxFile(temp, useNewFile=False, clearNeedSaveFlag=False, quiet=True): return
+            self.backup_manager.mark_saved(scene)
+            self.threadpool.start(BackupWorker(self.backup_manager, scene, temp))
+        except Exception as e: log_error("Backup: " + str(e))
+
+    def on_selection_changed(self, *args): self.btn_import.setEnabled(self.asset_list.selectionModel().hasSelection())
+
+    def update_asset_info(self, index):
+        folder = index.data(QtCore.Qt.UserRole)
+        f = self.find_main_file(folder)
         if f:
-            st = os.stat(f)
+            row = self.library_index.get(folder)
             self.lbl_info_name.setText(os.path.basename(f))
-            self.lbl_info_size.setText("{:.1f} MB".format(st.st_size/(1024*1024)))
-            self.lbl_info_date.setText(datetime.fromtimestamp(st.st_mtime).strftime('%Y-%m-%d'))
-            try:
-                render_guess = pymxs.runtime.NoobToolsCoreInst.guessRenderer(f)
-                self.lbl_info_renderer.setText(str(render_guess))
-            except Exception: self.lbl_info_renderer.setText("Unknown")
+            self.lbl_info_size.setText("{:.1f} MB".format((row['size'] or 0)/(1024*1024)))
+            self.lbl_info_date.setText(datetime.fromtimestamp(row['file_mtime'] or 0).strftime('%Y-%m-%d'))
+            self.info_folder = folder
+            if not f.lower().endswith(".max"): self.lbl_info_renderer.setText("N/A")
+            elif folder in self.asset_model.renderers: self.lbl_info_renderer.setText(self.asset_model.renderers[folder])
+            else:
+                self.lbl_info_renderer.setText("Detectando...")
+                worker = RendererDetectWorker([(folder, f)], self.renderer_cache)
+                worker.signals.scan_result.connect(self.on_renderers_detected)
+                self.threadpool.start(worker)
         else: 
+            self.info_folder = None
             self.lbl_info_name.setText("No 3D file")
             self.lbl_info_size.setText("-"); self.lbl_info_date.setText("-"); self.lbl_info_renderer.setText("-")
 
@@ -1104,40 +1531,42 @@ class NoobToolsWindow(QtWidgets.QWidget):
             if b != btn: b.setChecked(False)
         self.filter_assets(self.input_search.text())
 
+    def current_format_filter(self):
+        if self.btn_max.isChecked(): return ".max"
+        if self.btn_fbx.isChecked(): return ".fbx"
+        if self.btn_skp.isChecked(): return ".skp"
+        if self.btn_obj.isChecked(): return ".obj"
+        return ""
+
     def filter_assets(self, txt):
-        mode = "ALL"
-        if self.btn_max.isChecked(): mode = ".max"
-        elif self.btn_fbx.isChecked(): mode = ".fbx"
-        
-        vc = 0
+        mode = self.current_format_filter()
         search_terms = txt.lower().split()
-        
-        for i in range(self.asset_list.count()):
-            it = self.asset_list.item(i)
-            folder_path = it.data(QtCore.Qt.UserRole)
-            name = os.path.basename(folder_path).lower()
-            
-            # Check Tags from metadata.json
-            tags = []
-            meta_path = os.path.join(folder_path, "metadata.json")
-            if os.path.exists(meta_path):
-                try:
-                    with open(meta_path, 'r') as f:
-                        meta_data = json.load(f)
-                        tags = [str(t).lower() for t in meta_data.get('tags', [])]
-                except Exception: pass
-            
-            # Match Logic
-            match = True
-            for term in search_terms:
-                if not (term in name or any(term in t for t in tags)):
-                    match = False; break
-            
-            if mode != "ALL" and match:
-                match = any(glob.glob(os.path.join(folder_path, "*"+mode)) for mode in [mode, mode.upper()])
-            
-            it.setHidden(not match)
-            if match: vc += 1
+
+        # Busca na biblioteca inteira pelo índice invertido (nome + tags do metadata.json)
+        if search_terms and self.search_index is not None:
+            entries = self.search_index.entries
+            if self.search_active and self.asset_search.is_refinement(search_terms, mode):
+                # Busca só estendida: refina o resultado anterior e esconde o que saiu
+                self.search_ids = self.search_index.query_ids(search_terms, within=self.search_ids)
+                self.asset_search.apply([self.asset_model.entry_index(entries[i]['path']) for i in self.search_ids], search_terms, mode)
+            else:
+                ids = self.search_index.query_ids(search_terms)
+                self.search_ids = [i for i in ids if mode in entries[i]['formats']] if mode else ids
+                self.search_active = True
+                self.fill_asset_grid([entries[i] for i in self.search_ids], show_category=True)
+                self.asset_search.apply(range(len(self.search_ids)), search_terms, mode)
+            self.lbl_info_count.setText("Items: {}".format(len(self.search_ids)))
+            return
+
+        if self.search_active: self.show_folder_assets()
+
+        # Filtro local da pasta atual (também usado enquanto o índice de busca não ficou pronto)
+        def match(row, terms):
+            entry = self.asset_model.entries[row]
+            name = entry['name'].lower()
+            if not all(t in name or any(t in tag for tag in entry['tags']) for t in terms): return False
+            return not mode or mode in entry['formats']
+        vc = self.asset_search.filter(search_terms, match, scope=mode)
         self.lbl_info_count.setText("Items: {}".format(vc))
 
     def open_asset_context_menu(self, pos):
@@ -1151,7 +1580,9 @@ class NoobToolsWindow(QtWidgets.QWidget):
             else:
                 import subprocess
                 subprocess.Popen(['xdg-open', path])
-        item_path = self.asset_list.itemAt(pos).data(QtCore.Qt.UserRole)
+        index = self.asset_list.indexAt(pos)
+        if not index.isValid(): return
+        item_path = index.data(QtCore.Qt.UserRole)
         m.addAction("Explore").triggered.connect(lambda: explore_folder(item_path))
         qt_exec(m, self.asset_list.mapToGlobal(pos))
     
@@ -1212,6 +1643,21 @@ class NoobToolsWindow(QtWidgets.QWidget):
                 self.chk_autobackup.setChecked(self.settings.get('enable_autobackup', True))
             if hasattr(self, 'edt_mat_path'):
                 self.edt_mat_path.setText(self.settings.get('mat_lib_path', ""))
+            if hasattr(self, 'spn_cache_mb'):
+                self.spn_cache_mb.setValue(int(self.settings.get('thumb_cache_mb', DEFAULT_MAX_MB)))
+            self.thumb_cache.set_max_bytes(int(self.settings.get('thumb_cache_mb', DEFAULT_MAX_MB)) * 1024 * 1024)
+            self.thumb_service.set_memory_budget(int(self.settings.get('thumb_memory_mb', DEFAULT_MEMORY_MB)) * 1024 * 1024)
+            if hasattr(self, 'spn_backup_keep'):
+                self.spn_backup_keep.setValue(int(self.settings.get('backup_keep', DEFAULT_KEEP)))
+                self.spn_backup_mb.setValue(int(self.settings.get('backup_max_mb', DEFAULT_BACKUP_MB)))
+                self.spn_backup_window.setValue(int(self.settings.get('backup_window_s', DEFAULT_WINDOW)))
+            if hasattr(self, 'spn_bitmap_paths'):
+                self.spn_bitmap_paths.setValue(int(self.settings.get('bitmap_paths_max', DEFAULT_MAX_PATHS)))
+                self.chk_bitmap_session.setChecked(self.settings.get('bitmap_paths_session', False))
+            self.bitmap_paths = BitmapPathRegistry(MaxBitmapPaths(pymxs.runtime), self.settings.get('bitmap_paths_max', DEFAULT_MAX_PATHS),
+                                                   self.settings.get('bitmap_paths_owned', []))
+            self.backup_manager.configure(self.settings.get('backup_keep', DEFAULT_KEEP), self.settings.get('backup_max_mb', DEFAULT_BACKUP_MB),
+                                          self.settings.get('backup_window_s', DEFAULT_WINDOW))
                 
         except Exception as e:
             print("[NoobTools] Erro ao carregar configurações: " + str(e))
@@ -1230,6 +1676,16 @@ class NoobToolsWindow(QtWidgets.QWidget):
                 self.settings['enable_autobackup'] = self.chk_autobackup.isChecked()
             if hasattr(self, 'edt_mat_path'):
                 self.settings['mat_lib_path'] = self.edt_mat_path.text()
+            if hasattr(self, 'spn_cache_mb'):
+                self.settings['thumb_cache_mb'] = self.spn_cache_mb.value()
+            if hasattr(self, 'spn_bitmap_paths'):
+                self.settings['bitmap_paths_max'] = self.spn_bitmap_paths.value()
+                self.settings['bitmap_paths_session'] = self.chk_bitmap_session.isChecked()
+            self.settings['bitmap_paths_owned'] = self.bitmap_paths.owned()
+            if hasattr(self, 'spn_backup_keep'):
+                self.settings['backup_keep'] = self.spn_backup_keep.value()
+                self.settings['backup_max_mb'] = self.spn_backup_mb.value()
+                self.settings['backup_window_s'] = self.spn_backup_window.value()
                 
             with open(self.settings_file, 'w', encoding='utf-8') as f:
                 json.dump(self.settings, f, indent=4, ensure_ascii=False)
@@ -1242,13 +1698,13 @@ class NoobToolsWindow(QtWidgets.QWidget):
         # Também bloquear sinais dos widgets críticos
         if hasattr(self, 'chk_autobackup'): self.chk_autobackup.blockSignals(status)
         if hasattr(self, 'edt_mat_path'): self.edt_mat_path.blockSignals(status)
+        if hasattr(self, 'spn_cache_mb'): self.spn_cache_mb.blockSignals(status)
+        for name in ('spn_backup_keep', 'spn_backup_mb', 'spn_backup_window', 'spn_bitmap_paths', 'chk_bitmap_session'):
+            if hasattr(self, name): getattr(self, name).blockSignals(status)
 
     def manual_clear_cache(self):
         try:
-            if os.path.exists(self.cache_dir):
-                for f in os.listdir(self.cache_dir):
-                    try: os.remove(os.path.join(self.cache_dir, f))
-                    except Exception: pass
+            self.thumb_cache.clear()
             self.update_cache_size_label()
             QtWidgets.QMessageBox.information(self, "Success", "Cache cleared!")
         except Exception: pass
@@ -1256,22 +1712,45 @@ class NoobToolsWindow(QtWidgets.QWidget):
     def on_autobackup_changed(self):
         self.save_all_settings()
 
+    def on_cache_limit_changed(self, value):
+        self.thumb_cache.set_max_bytes(value * 1024 * 1024)
+        self.thumb_cache.flush()
+        self.update_cache_size_label()
+        self.save_all_settings()
+
+    def on_bitmap_paths_limit_changed(self, value):
+        self.bitmap_paths.set_limit(value)
+        self.save_all_settings()
+
+    def clear_bitmap_paths(self):
+        removed = self.bitmap_paths.release_all()
+        self.save_all_settings()
+        self.show_toast("Bitmap paths removidos: {}".format(removed))
+
+    def on_backup_limits_changed(self, *args):
+        self.backup_manager.configure(self.spn_backup_keep.value(), self.spn_backup_mb.value(), self.spn_backup_window.value())
+        self.save_all_settings()
+
     def update_cache_size_label(self):
         try:
-            if os.path.exists(self.cache_dir):
-                total_size = 0
-                for dirpath, dirnames, filenames in os.walk(self.cache_dir):
-                    for f in filenames:
-                        try: total_size += os.path.getsize(os.path.join(dirpath, f))
-                        except Exception: pass
-                self.lbl_cache_size.setText("Cache Size: {:.2f} MB".format(total_size / (1024 * 1024)))
-            else: self.lbl_cache_size.setText("Cache Size: 0 MB")
+            self.lbl_cache_size.setText("Cache Size: {:.2f} MB ({} miniaturas, limite {} MB) | Memória: {:.1f}/{} MB".format(
+                self.thumb_cache.total_bytes() / (1024 * 1024), self.thumb_cache.count(), self.thumb_cache.max_bytes // (1024 * 1024),
+                self.thumb_service.memory_used() / (1024 * 1024), self.thumb_service.memory_budget // (1024 * 1024)))
         except Exception: self.lbl_cache_size.setText("Cache Size: Error")
 
 
     def closeEvent(self, e):
+        if self.settings.get('bitmap_paths_session', False): self.bitmap_paths.release_all()
         self.save_all_settings()
-        if self.current_worker: self.current_worker.stop()
+        if self.renderer_worker: self.renderer_worker.stop()
+        self.thumb_cache.flush()
+        self.thumb_scheduler.stop()
+        if self.mat_thumb_job: self.mat_thumb_job.stop()
         if self.scanner_worker: self.scanner_worker.stop()
+        if self.missing_worker: self.missing_worker.stop()
+        if self.collect_worker: self.collect_worker.stop()
+        if self.pack_check_worker: self.pack_check_worker.stop()
+        if self.pack_worker: self.pack_worker.stop()
+        if self.index_worker: self.index_worker.stop()
         e.accept()
 
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+from src.utils.qt_compat import QtCore
+
+
+def is_refinement(old_terms, new_terms):
+    """True se a nova busca só restringe a anterior (cada termo antigo é prefixo de algum novo)."""
+    if old_terms is None: return False
+    return all(any(n.startswith(o) for n in new_terms) for o in old_terms)
+
+
+class SearchController(QtCore.QObject):
+    """Busca com debounce sobre uma lista (QListWidget ou QListView com modelo).
+
+    O texto só é avaliado `delay` ms depois da última tecla (sinal `searched`).
+    Quando a nova busca apenas estende a anterior, só as linhas que ainda estavam
+    visíveis são testadas de novo. Se o modelo sabe filtrar (`set_visible_rows`)
+    o filtro é aplicado de uma vez nele; senão a visibilidade é aplicada em lotes,
+    com o repaint da lista suspenso, e lotes de uma busca antiga são descartados.
+    """
+    searched = QtCore.Signal(str)
+    BATCH_SIZE = 1500
+
+    def __init__(self, line_edit, view, delay=150, parent=None):
+        super(SearchController, self).__init__(parent or view)
+        self.line_edit = line_edit
+        self.view = view
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.run_now)
+        self.line_edit.textChanged.connect(lambda _: self.timer.start())
+        self.reset()
+
+    def reset(self):
+        """Chamar sempre que a lista for repopulada."""
+        self._generation = getattr(self, '_generation', 0) + 1
+        self._terms = None
+        self._scope = None
+        self._visible = None
+        self._hidden = [False] * self._row_count()
+        self._pending = []
+
+    def _row_count(self):
+        model = self.view.model()
+        return model.source_count() if hasattr(model, 'set_visible_rows') else model.rowCount()
+
+    def run_now(self):
+        self.timer.stop()
+        self.searched.emit(self.line_edit.text())
+
+    def is_refinement(self, terms, scope=None):
+        return scope == self._scope and self._visible is not None and is_refinement(self._terms, terms)
+
+    def filter(self, terms, match_fn, scope=None):
+        """Aplica `match_fn(row, terms)` e retorna quantas linhas ficaram visíveis.
+        `scope` identifica filtros extras (ex.: formato); mudar o scope invalida o refinamento."""
+        if self.is_refinement(terms, scope): candidates = sorted(self._visible)
+        else: candidates = range(self._row_count())
+        visible = set(r for r in candidates if match_fn(r, terms))
+        self.apply(visible, terms, scope)
+        return len(visible)
+
+    def apply(self, visible, terms=None, scope=None):
+        """Deixa visíveis apenas as linhas em `visible`."""
+        self._terms = terms
+        self._scope = scope
+        self._visible = set(visible)
+        self._generation += 1
+        model = self.view.model()
+        if hasattr(model, 'set_visible_rows'):
+            model.set_visible_rows(self._visible)
+            return
+        self._pending = [r for r, hidden in enumerate(self._hidden) if hidden == (r in self._visible)]
+        self._apply_batch(self._generation)
+
+    def _apply_batch(self, generation):
+        if generation != self._generation or not self._pending: return
+        batch, self._pending = self._pending[:self.BATCH_SIZE], self._pending[self.BATCH_SIZE:]
+        self.view.setUpdatesEnabled(False)
+        try:
+            for r in batch:
+                hide = r not in self._visible
+                self.view.setRowHidden(r, hide)
+                self._hidden[r] = hide
+        finally:
+            self.view.setUpdatesEnabled(True)
+        if self._pending:
+            QtCore.QTimer.singleShot(0, lambda: self._apply_batch(generation))
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+
+from src.utils.qt_compat import QtCore, QtGui
+from src.core.threads import ThumbnailJob
+
+DEFAULT_MEMORY_MB = 128
+
+
+class ThumbnailService(QtCore.QObject):
+    """Miniaturas compartilhadas pelas abas Asset Manager e Materials.
+
+    Nível 1: ícones já decodificados em memória, LRU limitado em bytes (vive na
+    thread da UI, chave = caminho do asset/.mat). Nível 2: ThumbnailCache em disco,
+    consultado pelos workers dos jobs. Revisitar uma pasta na mesma sessão sai
+    direto do nível 1, sem tocar no disco.
+    """
+    icons_updated = QtCore.Signal(object)
+
+    def __init__(self, thumb_cache, threadpool, memory_bytes=DEFAULT_MEMORY_MB * 1024 * 1024, parent=None):
+        super(ThumbnailService, self).__init__(parent)
+        self.thumb_cache = thumb_cache
+        self.threadpool = threadpool
+        self.memory_budget = memory_bytes
+        self._icons = OrderedDict()   # caminho -> (QIcon, bytes)
+        self._memory_used = 0
+
+    # --------------------------------------------------------------------------
+    # Nível 1 (memória)
+    # --------------------------------------------------------------------------
+    def icon(self, path):
+        hit = self._icons.get(path)
+        if hit is None: return None
+        self._icons.move_to_end(path)
+        return hit[0]
+
+    def has(self, path): return path in self._icons
+
+    def put_icon(self, path, icon, nbytes):
+        old = self._icons.pop(path, None)
+        if old is not None: self._memory_used -= old[1]
+        self._icons[path] = (icon, nbytes)
+        self._memory_used += nbytes
+        self._evict()
+
+    def put_images(self, pairs):
+        """Converte (caminho, QImage) vindos dos workers em ícones e avisa as views.
+        QPixmap/QIcon só podem ser criados na thread da UI."""
+        paths = []
+        for path, image in pairs:
+            pix = QtGui.QPixmap.fromImage(image)
+            self.put_icon(path, QtGui.QIcon(pix), pix.width() * pix.height() * 4)
+            paths.append(path)
+        if paths: self.icons_updated.emit(paths)
+        return paths
+
+    def invalidate(self, paths):
+        """Descarta da memória os ícones desses itens (preview alterado no disco)."""
+        for path in paths:
+            hit = self._icons.pop(path, None)
+            if hit is not None: self._memory_used -= hit[1]
+
+    def set_memory_budget(self, nbytes):
+        self.memory_budget = nbytes
+        self._evict()
+
+    def memory_used(self): return self._memory_used
+
+    def _evict(self):
+        while self._memory_used > self.memory_budget and self._icons:
+            _, (_, nbytes) = self._icons.popitem(last=False)
+            self._memory_used -= nbytes
+
+    # --------------------------------------------------------------------------
+    # Nível 2 (disco, via workers)
+    # --------------------------------------------------------------------------
+    def create_job(self, items, thumb_size=None, caption=True):
+        """Job ainda parado: conecte os sinais antes de `job.start()` (um lote rápido,
+        só de cache, emite antes de qualquer slot existir)."""
+        return ThumbnailJob(items, self.thumb_cache, self.threadpool, thumb_size, caption)
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from src.utils.qt_compat import QtWidgets, QtCore
 
-class DroppableAssetList(QtWidgets.QListWidget):
+class DroppableAssetList(QtWidgets.QListView):
     files_dropped = QtCore.Signal(list)
     def __init__(self, parent=None):
         super(DroppableAssetList, self).__init__(parent)
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+# Os testes cobrem só os módulos de src/core que não dependem do Max nem do Qt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
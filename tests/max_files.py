@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""Documentos OLE mínimos com cara de .max, para os testes do leitor de metadados."""
+import struct
+import uuid
+
+SECTOR = 512
+FREE, END, FAT_SECTOR = 0xFFFFFFFF, 0xFFFFFFFE, 0xFFFFFFFD
+
+
+def asset_stream(assets):
+    """Conteúdo de um FileAssetMetaData a partir de [(tipo, caminho), ...]."""
+    def text(t): return struct.pack("<I", len(t)) + t.encode('utf-16-le')
+    return b"".join(uuid.uuid4().bytes + text(kind) + text(path) for kind, path in assets)
+
+
+def write_max(path, streams):
+    """Grava `streams` ([(nome, bytes), ...]) num CFB. O corte do mini stream é 0, então
+    todo stream fica em setores normais (uma FAT de um setor só basta)."""
+    sectors, fat = [None], {0: FAT_SECTOR}
+
+    def alloc(data):
+        count, start = max(1, -(-len(data) // SECTOR)), len(sectors)
+        for i in range(count):
+            sectors.append(data[i * SECTOR:(i + 1) * SECTOR].ljust(SECTOR, b"\0"))
+            fat[start + i] = start + i + 1 if i < count - 1 else END
+        return start
+
+    def entry(name, kind, start, size, child=FREE, right=FREE):
+        raw = (name + "\0").encode('utf-16-le')
+        return (raw.ljust(64, b"\0") + struct.pack("<HBB", len(raw), kind, 1) + struct.pack("<III", FREE, right, child)
+                + b"\0" * 36 + struct.pack("<IQ", start, size))
+
+    placed = [(name, alloc(data), len(data)) for name, data in streams]
+    directory = entry("Root Entry", 5, END, 0, child=1 if placed else FREE)
+    for i, (name, start, size) in enumerate(placed):
+        directory += entry(name, 2, start, size, right=i + 2 if i + 1 < len(placed) else FREE)
+    first_dir = alloc(directory)
+    sectors[0] = b"".join(struct.pack("<I", fat.get(i, FREE)) for i in range(SECTOR // 4))
+
+    header = bytearray(SECTOR)
+    header[0:8] = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+    struct.pack_into("<HHHHH", header, 0x18, 0x3E, 3, 0xFFFE, 9, 6)
+    struct.pack_into("<II", header, 0x2C, 1, first_dir)
+    struct.pack_into("<IIIII", header, 0x38, 0, END, 0, END, 0)
+    struct.pack_into("<109I", header, 0x4C, *([0] + [FREE] * 108))
+    with open(path, 'wb') as f: f.write(bytes(header) + b"".join(sectors))
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import os
+
+from src.core.backup_manager import BackupManager
+
+
+def snapshot(manager, scene, data):
+    temp = manager.snapshot_path(scene)
+    with open(temp, 'wb') as f: f.write(data)
+    manager.mark_saved(scene)
+    return temp
+
+
+def test_snapshot_paths_are_unique(tmp_path):
+    manager = BackupManager(window=0)
+    scene = str(tmp_path / "scene.max")
+    first = snapshot(manager, scene, b"a")
+    second = snapshot(manager, scene, b"b")
+    assert first != second
+    assert open(first, 'rb').read() == b"a"
+    manager.finalize(scene, first)
+    manager.finalize(scene, second)
+    assert len([f for f in os.listdir(manager.backup_dir(scene)) if f.endswith(".max")]) == 2
+
+
+def test_identical_snapshots_are_stored_once(tmp_path):
+    manager = BackupManager(window=0)
+    scene = str(tmp_path / "scene.max")
+    final, duplicate = manager.finalize(scene, snapshot(manager, scene, b"same"))
+    again, duplicate_again = manager.finalize(scene, snapshot(manager, scene, b"same"))
+    assert (duplicate, duplicate_again) == (False, True)
+    assert again == final
+
+
+def test_rotation_keeps_newest(tmp_path):
+    manager = BackupManager(keep=2, window=0)
+    scene = str(tmp_path / "scene.max")
+    for data in (b"1", b"2", b"3"):
+        manager.finalize(scene, snapshot(manager, scene, data))
+    kept = [f for f in os.listdir(manager.backup_dir(scene)) if f.endswith(".max") and not f.startswith(".")]
+    assert sorted(open(os.path.join(manager.backup_dir(scene), f), 'rb').read() for f in kept) == [b"2", b"3"]
+
+
+def test_throttle_and_clean_scene(tmp_path):
+    manager = BackupManager(window=60)
+    scene = str(tmp_path / "scene.max")
+    assert manager.should_backup(scene, dirty=False)[0] is False
+    assert manager.should_backup(scene)[0] is True
+    manager.mark_saved(scene)
+    assert manager.should_backup(scene)[0] is False
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import os
+
+from src.core.library_index import LibraryIndex
+
+from max_files import asset_stream, write_max
+
+
+def write(path, data, mtime):
+    with open(path, 'wb') as f: f.write(data)
+    os.utime(path, (mtime, mtime))
+
+
+def test_overwritten_main_file_is_refreshed(tmp_path):
+    asset = tmp_path / "chair"
+    asset.mkdir()
+    main = str(asset / "chair.max")
+    write(main, b"a", 1000)
+    os.utime(str(asset), (500, 500))
+    index = LibraryIndex(str(tmp_path / "index.db"))
+    assert index.sync_dir(str(asset), depth=0) == [str(asset)]
+    assert index.sync_dir(str(asset), depth=0) == []
+
+    # Sobrescrito no lugar: o mtime da pasta não muda
+    write(main, b"bigger", 2000)
+    os.utime(str(asset), (500, 500))
+    assert index.sync_dir(str(asset), depth=0) == [str(asset)]
+    row = index.get(str(asset))
+    assert (row['size'], row['file_mtime']) == (6, 2000)
+    index.close()
+
+
+def test_dependencies_follow_overwritten_max(tmp_path):
+    asset = tmp_path / "lib" / "chair"
+    asset.mkdir(parents=True)
+    main = str(asset / "chair.max")
+    write_max(main, [("FileAssetMetaData2", asset_stream([("Bitmap", "C:\\maps\\wood.jpg")]))])
+    os.utime(main, (1000, 1000))
+    os.utime(str(asset), (500, 500))
+    index = LibraryIndex(str(tmp_path / "index.db"))
+    index.sync_dir(str(asset), depth=0)
+    assert index.refresh_dependencies(str(tmp_path / "lib")) == 1
+    assert index.get_dependencies(str(asset)) == [{'type': "Bitmap", 'path': "C:\\maps\\wood.jpg"}]
+    assert index.refresh_dependencies(str(tmp_path / "lib")) == 0
+
+    write_max(main, [("FileAssetMetaData2", asset_stream([("Bitmap", "C:\\maps\\oak.jpg"), ("Bitmap", "C:\\maps\\oak_n.jpg")]))])
+    os.utime(main, (2000, 2000))
+    os.utime(str(asset), (500, 500))
+    index.sync_dir(str(asset), depth=0)
+    assert index.get_dependencies(str(asset)) is None
+    assert index.refresh_dependencies(str(tmp_path / "lib")) == 1
+    assert [a['path'] for a in index.get_dependencies(str(asset))] == ["C:\\maps\\oak.jpg", "C:\\maps\\oak_n.jpg"]
+    index.close()
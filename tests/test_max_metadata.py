@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from src.core.max_metadata import SUMMARY_STREAM, guess_renderer, read_asset_metadata
+
+from max_files import asset_stream, write_max
+
+
+def test_reads_assets(tmp_path):
+    path = str(tmp_path / "chair.max")
+    write_max(path, [("FileAssetMetaData3", asset_stream([("Bitmap", "C:\\maps\\wood.jpg"), ("XRef", "\\\\srv\\x.max")]))])
+    assert [(a.type, a.path) for a in read_asset_metadata(path)] == [("Bitmap", "C:\\maps\\wood.jpg"), ("XRef", "\\\\srv\\x.max")]
+
+
+def test_guess_renderer_from_summary_and_assets(tmp_path):
+    corona = str(tmp_path / "a.max")
+    write_max(corona, [(SUMMARY_STREAM, b"Render Data\0Renderer Name=Corona 10\0")])
+    both = str(tmp_path / "b.max")
+    write_max(both, [(SUMMARY_STREAM, b"Corona"), ("FileAssetMetaData2", asset_stream([("Other", "C:\\p\\tree.vrmesh")]))])
+    plain = str(tmp_path / "c.max")
+    write_max(plain, [("FileAssetMetaData2", asset_stream([("Bitmap", "C:\\maps\\wood.jpg")]))])
+    assert guess_renderer(corona) == "Corona Render"
+    assert guess_renderer(both) == "V-Ray & Corona"
+    assert guess_renderer(plain) == "Unknown"
+
+
+def test_guess_renderer_without_reading(tmp_path):
+    broken = tmp_path / "vray_chair.max"
+    broken.write_bytes(b"not ole")
+    assert guess_renderer(str(broken)) == "V-Ray"
+    assert guess_renderer(str(tmp_path / "chair.fbx")) == "N/A"
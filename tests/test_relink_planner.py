@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import os
+
+from src.core.relink_index import RelinkIndex
+from src.core.relink_planner import RelinkPlanner
+
+
+def touch(path, data=b"x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f: f.write(data)
+
+
+def run_planner(tmp_path, missing, **kwargs):
+    index = RelinkIndex(str(tmp_path / "relink.db"))
+    try: return RelinkPlanner(missing, **kwargs).run(index, str(tmp_path / "lib"))
+    finally: index.close()
+
+
+def test_duplicate_names_are_ranked(tmp_path):
+    other = str(tmp_path / "lib" / "a" / "wood.jpg")
+    best = str(tmp_path / "lib" / "project" / "maps" / "wood.jpg")
+    touch(other); touch(best)
+
+    plan = run_planner(tmp_path, [r"C:\old\project\maps\wood.jpg"], exhaustive=True)
+
+    assert len(plan.entries) == 1
+    entry = plan.entries[0]
+    assert entry['method'] == 'exact'
+    assert entry['new'] == best
+    assert [alt[0] for alt in entry['alternatives']] == [other]
+    assert entry['confidence'] > entry['alternatives'][0][1]
+
+
+def test_duplicates_found_by_index_and_crawl_are_merged(tmp_path):
+    first = str(tmp_path / "lib" / "a" / "wood.jpg")
+    touch(first)
+    run_planner(tmp_path, [r"C:\x\wood.jpg"])
+    # Segunda execução: um vem do índice, o outro só aparece no crawl
+    second = str(tmp_path / "lib" / "b" / "wood.jpg")
+    touch(second)
+
+    plan = run_planner(tmp_path, [r"C:\x\wood.jpg"], exhaustive=True)
+
+    entry = plan.entries[0]
+    assert sorted([entry['new']] + [alt[0] for alt in entry['alternatives']]) == sorted([first, second])
+
+
+def test_candidates_per_name_are_capped(tmp_path):
+    for i in range(RelinkPlanner.MAX_CANDIDATES + 3):
+        touch(str(tmp_path / "lib" / "d{:02d}".format(i) / "wood.jpg"))
+
+    planner = RelinkPlanner([r"C:\x\wood.jpg"], exhaustive=True)
+    index = RelinkIndex(str(tmp_path / "relink.db"))
+    try: plan = planner.run(index, str(tmp_path / "lib"))
+    finally: index.close()
+
+    assert len(planner.candidates[r"C:\x\wood.jpg"]) == RelinkPlanner.MAX_CANDIDATES
+    assert len(plan.entries[0]['alternatives']) == RelinkPlanner.ALTERNATIVES
+    assert plan.unmatched == []
+
+
+def test_crawl_stops_once_every_missing_file_has_a_candidate(tmp_path):
+    touch(str(tmp_path / "lib" / "wood.jpg"))
+    for i in range(RelinkPlanner.MAX_CANDIDATES - 3):
+        touch(str(tmp_path / "lib" / "d{:02d}".format(i) / "wood.jpg"))
+
+    plan = run_planner(tmp_path, [r"C:\x\wood.jpg"])
+    assert plan.stats['dirs_listed'] == 1
+    assert plan.entries[0]['new'] == str(tmp_path / "lib" / "wood.jpg")
+
+    (tmp_path / "relink.db").unlink()
+    plan = run_planner(tmp_path, [r"C:\x\wood.jpg"], exhaustive=True)
+    assert plan.stats['dirs_listed'] == RelinkPlanner.MAX_CANDIDATES - 2
+    assert len(plan.entries[0]['alternatives']) == RelinkPlanner.ALTERNATIVES